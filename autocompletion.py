@@ -4,71 +4,207 @@ Benefits of using a Trie for autocompletion:
 - Returns matches quickly
 - Less operations than binary search on an ordered list
 
+Suggestions are ranked by word frequency: every node keeps the highest
+frequency found below it, so the k most frequent completions of a prefix
+are found best-first without walking the whole subtree
+
+Two layouts share the same interface (insert, getSuggestions):
+- Trie: one TrieNode (with __slots__) per character, cheap inserts
+- CompactTrie: every node packed into flat arrays, several times smaller
+for large vocabularies, inserts are buffered and packed before the next
+query
+- CompactTrie serializes to a flat binary (header + arrays) that can be
+used straight from a memory map, and tries of several documents can be
+merged into one shared vocabulary
+
 """
 
+# Imports ------------------------------------------------------------
+
+import gc
+import heapq
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+
+# Binary format: magic, format version, byte order mark, source version
+# (set by the caller, e.g. the extraction & cleaning versions), node count,
+# then childStart, frequency, bestFrequency (int32) and labels (UTF-32)
+TRIE_MAGIC = b'TSTR'
+TRIE_FORMAT_VERSION = 1
+TRIE_HEADER = struct.Struct('=4sHHII')
+BYTE_ORDER_MARK = 0xFEFF  # Read back as 0xFFFE on a machine of the other byte order
+
 # Classes & Functions --------------------------------------------------
 
 class TrieNode:
+    __slots__ = ('children', 'isEndOfWord', 'frequency', 'bestFrequency')
+
     def __init__(self):
         self.children = {}
         self.isEndOfWord = False
+        self.frequency = 0  # Occurrences of the word ending here
+        self.bestFrequency = 0  # Highest frequency of any word in this subtree
 
 class Trie:
     def __init__(self):
         self.root = TrieNode()
 
-    def insert(self, word):
+    def insert(self, word, frequency=1):
         current = self.root
+        path = [current]
         for char in word:
             if char not in current.children:
                 current.children[char] = TrieNode()
             current = current.children[char]
+            path.append(current)
         current.isEndOfWord = True
+        current.frequency += frequency
+
+        # Frequencies only grow, so the subtree maxima stay valid
+        for node in path:
+            if node.bestFrequency < current.frequency:
+                node.bestFrequency = current.frequency
+
+    @classmethod
+    def fromWords(cls, words):
+        # Bulk load of a vocabulary (word -> frequency) or a word list. Every
+        # node created is kept, so the cyclic garbage collector is paused
+        # instead of rescanning the growing trie over and over (about half
+        # the time)
+        frequencies = words.items() if isinstance(words, dict) else ((word, 1) for word in words)
+        trie = cls()
+        collectorWasEnabled = gc.isenabled()
+        gc.disable()
+        try:
+            for word, frequency in frequencies:
+                trie.insert(word, frequency)
+        finally:
+            if collectorWasEnabled:
+                gc.enable()
+        return trie
+
+    # Node accessors, the searches below only go through these
+    def childItems(self, node):
+        return node.children.items()
+
+    def child(self, node, char):
+        return node.children.get(char)
+
+    def wordFrequency(self, node):
+        # Frequency of the word ending at node, None if no word ends there
+        return node.frequency if node.isEndOfWord else None
+
+    def subtreeFrequency(self, node):
+        return node.bestFrequency
+
+    def iterWords(self):
+        # Every (word, frequency) pair, depth first
+        stack = [(self.root, "")]
+        while stack:
+            node, current = stack.pop()
+            frequency = self.wordFrequency(node)
+            if frequency is not None:
+                yield current, frequency
+            for char, childNode in self.childItems(node):
+                stack.append((childNode, current + char))
+
+    def findNode(self, prefix, node=None):
+        node = self.root if node is None else node
+        for char in prefix:
+            node = self.child(node, char)
+            if node is None:
+                return None
+        return node
+
+    def topCompletions(self, node, prefix, limit):
+        # Best-first walk: branches are ordered by their best frequency and a
+        # word is only taken once no branch left can beat it (ties go
+        # alphabetically), so about limit paths below the prefix are visited
+        suggestions = []
+        heap = [(-self.subtreeFrequency(node), prefix, True, node)]
+        while heap and len(suggestions) < limit:
+            _, word, isBranch, current = heapq.heappop(heap)
+            if not isBranch:
+                suggestions.append(word)
+                continue
+            frequency = self.wordFrequency(current)
+            if frequency is not None:
+                heapq.heappush(heap, (-frequency, word, False, None))
+            for char, childNode in self.childItems(current):
+                heapq.heappush(heap, (-self.subtreeFrequency(childNode), word + char, True, childNode))
+        return suggestions
 
-    def collectWords(self, node, currentWord, suggestions, limit):
-        if len(suggestions) >= limit:
-            return
-        if node.isEndOfWord:
-            suggestions.append(currentWord)
-        for char, childNode in node.children.items():
-            self.collectWords(childNode, currentWord + char, 
-                              suggestions, limit)
-            
     def getSuggestions(self, prefix, limit=10, fuzzy=False, maxErrors=1):
         # Handle empty prefix
         if not prefix:
             return []
         
         if fuzzy:
-            # Use fuzzy matching with error tolerance
-            suggestions = []
-            self.fuzzySearch(self.root, prefix, "", maxErrors, suggestions, limit)
-            return suggestions[:limit]
+            # Use fuzzy matching with error tolerance: (word, distance) pairs
+            return self.fuzzySearch(prefix, maxErrors, limit)
         else:
-            # Exact prefix matching (original behavior)
-            node = self.root
-            for char in prefix:
-                if char not in node.children:
-                    return []
-                node = node.children[char]
-            suggestions = []
-            self.collectWords(node, prefix, suggestions, limit)
-            return suggestions[:limit]
+            # Most frequent completions of the prefix
+            node = self.findNode(prefix)
+            if node is None:
+                return []
+            return self.topCompletions(node, prefix, limit)
     
-    def fuzzySearch(self, node, target, current, maxErrors, suggestions, limit):
-        if len(suggestions) >= limit:
-            return
-        
-        # If current word is complete and close enough to target
-        if node.isEndOfWord and len(current) > 0:
-            distance = self.editDistance(current, target)
-            if distance <= maxErrors:
-                suggestions.append((current, distance))
-        
-        # Explore all children
-        for char, childNode in node.children.items():
-            self.fuzzySearch(childNode, target, current + char, 
-                           maxErrors, suggestions, limit)
+    def fuzzySearch(self, target, maxErrors, limit):
+        # Words within maxErrors edits of target, closest first (then most
+        # frequent, then alphabetical). One Levenshtein DP row is carried per
+        # trie depth, and only its diagonal band (|depth - column| <=
+        # maxErrors) is computed, the cells outside it can't be <= maxErrors.
+        # A branch is dropped as soon as its whole band is > maxErrors
+        columns = len(target) + 1
+        tooFar = maxErrors + 1
+        firstRow = [column if column <= maxErrors else tooFar for column in range(columns)]
+        candidates = []
+        stack = [(self.root, "", firstRow, 0)]
+        while stack:
+            node, current, previousRow, previousBest = stack.pop()
+            if previousBest == maxErrors:
+                # No error left: the rest of the word can only be the rest of
+                # the target after a cell still at maxErrors, a direct lookup
+                for column in range(max(0, len(current) - maxErrors),
+                                    min(columns - 1, len(current) + maxErrors + 1)):
+                    if previousRow[column] == maxErrors:
+                        end = self.findNode(target[column:], node)
+                        frequency = None if end is None else self.wordFrequency(end)
+                        if frequency is not None:
+                            candidates.append((maxErrors, -frequency, current + target[column:]))
+                continue
+
+            depth = len(current) + 1
+            first = max(1, depth - maxErrors)
+            last = min(columns - 1, depth + maxErrors)
+            for char, childNode in self.childItems(node):
+                row = [tooFar] * columns
+                if depth <= maxErrors:
+                    row[0] = depth
+                best = row[0]
+                for column in range(first, last + 1):
+                    distance = previousRow[column - 1] + (target[column - 1] != char)  # Substitute
+                    if previousRow[column] < distance:
+                        distance = previousRow[column] + 1  # Delete from word
+                    if row[column - 1] < distance:
+                        distance = row[column - 1] + 1  # Insert into word
+                    row[column] = distance
+                    if distance < best:
+                        best = distance
+                if best > maxErrors:
+                    continue
+                word = current + char
+                if row[-1] <= maxErrors:
+                    frequency = self.wordFrequency(childNode)
+                    if frequency is not None:
+                        candidates.append((row[-1], -frequency, word))
+                stack.append((childNode, word, row, best))
+
+        # True best-k among every word within reach, not the first k found
+        return [(word, distance) for distance, _, word in heapq.nsmallest(limit, candidates)]
     
     def editDistance(self, word1, word2):
         # Calculate Levenshtein distance (minimum edits to transform word1 to word2).
@@ -95,4 +231,151 @@ class Trie:
                         dp[i][j-1],      # Insert into word1
                         dp[i-1][j-1]     # Substitute
                     )
-        return dp[m][n]
\ No newline at end of file
+        return dp[m][n]
+
+class CompactTrie(Trie):
+    # Nodes are numbered breadth first, so the children of a node are
+    # contiguous (and sorted): node i's children are the nodes
+    # childStart[i] to childStart[i + 1] - 1, labels[j] is the character
+    # leading to node j. About 13 bytes per node instead of a TrieNode
+    # object and its dict
+    def __init__(self):
+        self.root = 0
+        self.labels = "\0"  # The root has no character
+        self.childStart = array('i', [1, 1])
+        self.frequency = array('i', [0])  # 0 = no word ends here
+        self.bestFrequency = array('i', [0])
+        self.pending = Counter()  # Inserted words not packed yet
+
+    def insert(self, word, frequency=1):
+        self.pending[word] += frequency
+
+    @classmethod
+    def fromWords(cls, words):
+        # Packs a vocabulary (word -> frequency) or a word list directly,
+        # without building TrieNode objects first
+        trie = cls()
+        trie.pack(words if isinstance(words, dict) else Counter(words))
+        return trie
+
+    def pack(self, vocabulary):
+        # Breadth-first over ranges of the sorted words: a node is the range
+        # of words sharing its prefix, each child range is found by bisection
+        words = sorted(vocabulary)
+        frequencies = [vocabulary[word] for word in words]
+        labels = ["\0"]
+        childStart = []
+        frequency = []
+        bestFrequency = []
+        queue = deque([(0, len(words), 0)])  # Word range and depth of each node
+        nextNode = 1
+        while queue:
+            first, last, depth = queue.popleft()
+            childStart.append(nextNode)
+            if last - first == 1:
+                # Single word left (most nodes): at most one child, no search
+                word = words[first]
+                bestFrequency.append(frequencies[first])
+                if len(word) == depth:
+                    frequency.append(frequencies[first])
+                else:
+                    frequency.append(0)
+                    labels.append(word[depth])
+                    queue.append((first, last, depth + 1))
+                    nextNode += 1
+                continue
+
+            bestFrequency.append(max(frequencies[first:last], default=0))
+            if first < last and len(words[first]) == depth:
+                frequency.append(frequencies[first])  # Sorted: the word itself comes first
+                first += 1
+            else:
+                frequency.append(0)
+            while first < last:
+                prefix = words[first][:depth + 1]
+                end = bisect_left(words, prefix[:-1] + chr(ord(prefix[-1]) + 1), first, last)
+                labels.append(prefix[-1])
+                queue.append((first, end, depth + 1))
+                nextNode += 1
+                first = end
+        childStart.append(nextNode)
+
+        self.labels = ''.join(labels)
+        self.childStart = array('i', childStart)
+        self.frequency = array('i', frequency)
+        self.bestFrequency = array('i', bestFrequency)
+
+    @classmethod
+    def merge(cls, tries):
+        # Shared vocabulary of several documents, frequencies are added up
+        vocabulary = Counter()
+        for trie in tries:
+            vocabulary.update(dict(trie.iterWords()))
+        return cls.fromWords(vocabulary)
+
+    def toBytes(self, sourceVersion=0):
+        self.flush()
+        nodeCount = len(self.frequency)
+        header = TRIE_HEADER.pack(TRIE_MAGIC, TRIE_FORMAT_VERSION, BYTE_ORDER_MARK,
+                                  sourceVersion, nodeCount)
+        return b''.join([header, bytes(self.childStart), bytes(self.frequency),
+                         bytes(self.bestFrequency), self.labels.encode('utf-32-le')])
+
+    @classmethod
+    def fromBuffer(cls, buffer, sourceVersion=0):
+        # The int32 arrays are views on the buffer (e.g. a memory map, only
+        # the pages a query touches are read), only the labels are decoded.
+        # None if the buffer is missing, truncated or from another version
+        if buffer is None or len(buffer) < TRIE_HEADER.size:
+            return None
+        magic, formatVersion, byteOrderMark, storedVersion, nodeCount = TRIE_HEADER.unpack_from(buffer)
+        if (magic, formatVersion, byteOrderMark, storedVersion) != (
+                TRIE_MAGIC, TRIE_FORMAT_VERSION, BYTE_ORDER_MARK, sourceVersion):
+            return None
+        if len(buffer) != TRIE_HEADER.size + (4 * nodeCount + 1) * 4:
+            return None
+
+        view = memoryview(buffer)
+        offset = TRIE_HEADER.size
+        parts = []
+        for count in (nodeCount + 1, nodeCount, nodeCount):
+            parts.append(view[offset:offset + count * 4].cast('i'))
+            offset += count * 4
+        trie = cls()
+        trie.childStart, trie.frequency, trie.bestFrequency = parts
+        trie.labels = str(view[offset:], 'utf-32-le')
+        return trie
+
+    def flush(self):
+        # Repacks with the words inserted since the last query
+        if self.pending:
+            vocabulary = Counter(dict(Trie.iterWords(self)))
+            vocabulary.update(self.pending)
+            self.pending = Counter()
+            self.pack(vocabulary)
+
+    def iterWords(self):
+        self.flush()
+        return super().iterWords()
+
+    def getSuggestions(self, prefix, limit=10, fuzzy=False, maxErrors=1):
+        self.flush()
+        return super().getSuggestions(prefix, limit, fuzzy, maxErrors)
+
+    def childItems(self, node):
+        start, end = self.childStart[node], self.childStart[node + 1]
+        return zip(self.labels[start:end], range(start, end))
+
+    def child(self, node, char):
+        found = self.labels.find(char, self.childStart[node], self.childStart[node + 1])
+        return found if found >= 0 else None
+
+    def wordFrequency(self, node):
+        return self.frequency[node] or None
+
+    def subtreeFrequency(self, node):
+        return self.bestFrequency[node]
+
+    def sizeInBytes(self):
+        return sum(sys.getsizeof(part) for part in (self.labels, self.childStart,
+                                                   self.frequency, self.bestFrequency))
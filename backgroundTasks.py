@@ -0,0 +1,125 @@
+"""
+Background task runner for the GUI:
+- Runs loading, indexing and searching on worker threads so the Tk
+event loop never freezes
+- Workers report progress per stage and can be cancelled cooperatively
+- Results and progress are handed back to the Tk thread through a queue
+that is polled with root.after (Tk widgets must only be touched there)
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import queue
+import threading
+
+# Classes & Functions --------------------------------------------------
+
+class TaskCancelled(Exception):
+    pass
+
+def checkCancelled(cancelEvent):
+    if cancelEvent is not None and cancelEvent.is_set():
+        raise TaskCancelled()
+
+def reportProgress(progress, stage, done=None, total=None):
+    if progress is not None:
+        progress(stage, done, total)
+
+class BackgroundTask:
+    def __init__(self, work, onDone, onError=None, onProgress=None, onPartial=None):
+        self.work = work
+        self.onDone = onDone
+        self.onError = onError
+        self.onProgress = onProgress
+        self.onPartial = onPartial
+        self.cancelEvent = threading.Event()
+
+    def cancel(self):
+        self.cancelEvent.set()
+
+    def isCancelled(self):
+        return self.cancelEvent.is_set()
+
+class TaskRunner:
+    def __init__(self, root, pollInterval=50):
+        self.root = root
+        self.pollInterval = pollInterval  # Milliseconds
+        self.messages = queue.Queue()
+        self.runningTasks = 0  # Only changed on the Tk thread
+        self.polling = False
+
+    def submit(self, work, onDone, onError=None, onProgress=None, onPartial=None):
+        # work(cancelEvent, progress) runs on a worker thread, tasks with
+        # onPartial also get publish(item) to stream partial results
+        task = BackgroundTask(work, onDone, onError, onProgress, onPartial)
+        self.runningTasks += 1
+        thread = threading.Thread(target=self.runTask, args=(task,), daemon=True)
+        thread.start()
+        self.startPolling()
+        return task
+
+    def runTask(self, task):
+        def progress(stage, done=None, total=None):
+            self.messages.put(('progress', task, (stage, done, total)))
+
+        def publish(item):
+            self.messages.put(('partial', task, item))
+
+        try:
+            if task.onPartial:
+                result = task.work(task.cancelEvent, progress, publish)
+            else:
+                result = task.work(task.cancelEvent, progress)
+            self.messages.put(('done', task, result))
+        except TaskCancelled:
+            self.messages.put(('cancelled', task, None))
+        except Exception as e:
+            self.messages.put(('error', task, e))
+
+    def startPolling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.pollInterval, self.poll)
+
+    def poll(self):
+        # Runs on the Tk thread, dispatches everything posted by workers
+        try:
+            while True:
+                try:
+                    kind, task, payload = self.messages.get_nowait()
+                except queue.Empty:
+                    break
+                if kind not in ('progress', 'partial'):
+                    self.runningTasks -= 1
+                if task.isCancelled():
+                    continue  # Results of cancelled tasks are dropped
+                try:
+                    self.dispatch(task, kind, payload)
+                except Exception as e:
+                    # A failing callback must not stop the delivery of later messages
+                    self.reportCallbackError(task, kind, e)
+        finally:
+            if self.runningTasks > 0:
+                self.root.after(self.pollInterval, self.poll)
+            else:
+                self.polling = False
+
+    def dispatch(self, task, kind, payload):
+        if kind == 'progress' and task.onProgress:
+            task.onProgress(*payload)
+        elif kind == 'partial':
+            task.onPartial(payload)
+        elif kind == 'done':
+            task.onDone(payload)
+        elif kind == 'error' and task.onError:
+            task.onError(payload)
+
+    def reportCallbackError(self, task, kind, error):
+        if task.onError and kind != 'error':
+            try:
+                task.onError(error)
+                return
+            except Exception as e:
+                error = e
+        print(f"Error in background task callback: {error}")
@@ -0,0 +1,585 @@
+"""
+Benchmarks, runnable offline with a single command:
+    python benchmarks.py startup
+    python benchmarks.py cleaning | equivalence
+    python benchmarks.py search | indexes | extraction
+    python benchmarks.py all [--save-baseline FILE] [--baseline FILE]
+
+startup: cold-start latency measured in fresh interpreters
+- plain-text search (should not load the PDF/Office/OCR libraries)
+- GUI window creation (needs a display and tkinterdnd2)
+
+cleaning: table-driven cleanText against the original multi-pass version
+- also checks both produce identical output (exits with 1 otherwise)
+equivalence: untimed check of cleanText and cleanTextWithOffsets against
+the reference over every code point and random mixed strings (exits
+with 1 on any difference)
+
+search: every algorithm over synthetic corpora (alphabets, pattern
+lengths and match densities), index builds are timed separately
+indexes: word index, suffix array, offset map and autocomplete Trie
+(node and compact layouts: build time, memory kept, query times),
+vocabulary build at growing sizes (time per word should stay flat)
+extraction: generated fixtures per format, extraction alone and, for the
+cached formats (PDF, Office), document loads through the disk cache (cold
+and warm, extraction + cleaning); Office formats need their libraries
+
+Every measurement reports its best time, throughput (MB/s) and peak
+memory (tracemalloc, measured in a separate run). Results can be saved as
+a JSON baseline, later runs compared against it exit with 1 when a
+measurement is slower than the baseline by more than --tolerance
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import textCleaning
+import textExtraction
+import patternSearching
+import wordIndex
+import documentCache
+import autocompletion
+import diskCache
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Functions ------------------------------------------------------------
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ('docx', 'pptx', 'openpyxl', 'pdfplumber', 'pytesseract', 'pdf2image')
+MB = 1024 * 1024
+BASELINE_VERSION = 1
+
+def printRow(name, value, unit=''):
+    print(f"{name:<45} {value:>12} {unit}")
+
+def measure(results, name, function, *args, sizeBytes=None, repeats=3, traceMemory=True):
+    # Best wall time, then peak memory in a separate traced run (tracing
+    # slows the code down, so it never affects the timing)
+    seconds, result = timeCall(function, *args, repeats=repeats)
+    record = {'seconds': seconds, 'peakBytes': None}
+    if traceMemory:
+        tracemalloc.start()
+        try:
+            function(*args)
+            record['peakBytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    details = []
+    if sizeBytes:
+        record['mbPerSecond'] = sizeBytes / MB / seconds if seconds else float('inf')
+        details.append(f"{record['mbPerSecond']:.2f} MB/s")
+    if record['peakBytes'] is not None:
+        details.append(f"peak {record['peakBytes'] / MB:.1f} MB")
+    results[name] = record
+    printRow(name, f"{seconds * 1000:.2f}", f"ms ({', '.join(details)})" if details else "ms")
+    return result
+
+def timeSubprocess(code, repeats=5):
+    # Best and median wall time of a fresh interpreter running code
+    env = dict(os.environ, TEXT_SEARCH_CACHE='0')
+    timings = []
+    output = ''
+    for _ in range(repeats):
+        startTime = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, env=env,
+                                   capture_output=True, text=True)
+        timings.append(time.perf_counter() - startTime)
+        if completed.returncode != 0:
+            return None, completed.stderr.strip().splitlines()[-1:]
+        output = completed.stdout
+    return (min(timings) * 1000, statistics.median(timings) * 1000), output
+
+def benchmarkStartup(repeats=5):
+    print("Startup (fresh interpreter, ms best / median)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        filePath = os.path.join(tempDir, 'sample.txt')
+        with open(filePath, 'w', encoding='utf-8') as file:
+            file.write("The quick brown fox jumps over the lazy dog.\n" * 1000)
+
+        cases = [
+            ("Python interpreter only", "pass"),
+            ("Plain-text search", (
+                "import sys, json, patternSearching\n"
+                f"patternSearching.searchText({filePath!r}, 'lazy dog')\n"
+                f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")),
+            ("GUI window", (
+                "from tkinterdnd2 import TkinterDnD\n"
+                "import mainInterface\n"
+                "window = TkinterDnD.Tk()\n"
+                "mainInterface.TextSearchingToolGUI(window)\n"
+                "window.update_idletasks()\n"
+                "window.destroy()")),
+        ]
+
+        for name, code in cases:
+            timings, output = timeSubprocess(code, repeats)
+            if timings is None:
+                printRow(name, "skipped", f"({' '.join(output)})")
+                continue
+            printRow(name, f"{timings[0]:.1f} / {timings[1]:.1f}", "ms")
+            if output.strip():
+                printRow("  heavy backends loaded", ', '.join(json.loads(output)) or "none")
+
+def generateText(size, alphabet, seed=0):
+    # Deterministic synthetic text made of words from the given alphabet
+    generator = random.Random(seed)
+    separators = [' '] * 8 + [', ', '. ', '\n', '  ', ' - ', '\t']
+    parts = []
+    length = 0
+    while length < size:
+        word = ''.join(generator.choice(alphabet) for _ in range(generator.randint(1, 10)))
+        parts.append(word)
+        parts.append(generator.choice(separators))
+        length += len(word) + 2
+    return ''.join(parts)[:size]
+
+CLEANING_CORPORA = {
+    'ascii prose': 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
+    'accented latin': 'abcdeéèêfghiíïjklmnñoóöpqrstuúüvwxyzÁÉÍÓÚÑÇçßœ',
+    'mixed unicode': 'abcxyzÀÉñ가나다αβγΣДЖЯ中文字ﬁ①\u0301\u0308İ',
+}
+
+def timeCall(function, *args, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        startTime = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - startTime)
+    return best, result
+
+def benchmarkCleaning(sizeMB=4, repeats=3, results=None):
+    print(f"Cleaning ({sizeMB} MB per corpus, best of {repeats})")
+    print("=" * 60)
+    results = {} if results is None else results
+    identical = True
+    for name, alphabet in CLEANING_CORPORA.items():
+        text = generateText(int(sizeMB * MB), alphabet)
+        sizeBytes = len(text.encode('utf-8'))
+        printRow(name, "")
+        referenceOutput = measure(results, f"cleaning/{name}/reference", textCleaning.referenceCleanText,
+                                  text, sizeBytes=sizeBytes, repeats=repeats)
+        cleanOutput = measure(results, f"cleaning/{name}/cleanText", textCleaning.cleanText,
+                              text, sizeBytes=sizeBytes, repeats=repeats)
+        measure(results, f"cleaning/{name}/cleanTextWithOffsets", textCleaning.cleanTextWithOffsets,
+                text, sizeBytes=sizeBytes, repeats=repeats)
+
+        matches = cleanOutput == referenceOutput
+        identical = identical and matches
+        speedup = (results[f"cleaning/{name}/reference"]['seconds']
+                   / results[f"cleaning/{name}/cleanText"]['seconds'])
+        printRow("  output", "identical" if matches else "DIFFERENT", f"({speedup:.1f}x faster)")
+    return identical
+
+# Characters mixed into the random equivalence strings: whitespace variants,
+# punctuation, accents, combining marks, expanding characters and astral ones
+EQUIVALENCE_ALPHABET = ('aZ09 .,-_\'"\t\n\r\x0b\x0c\x1c\x85\xa0\u2000\u2028\u3000'
+                        'éÉñÇßœǆǅﬁİıΣςДЖ가中①²\u0301\u0308\u0327\u200b\ufeff😀𝔸')
+
+def cleaningMismatch(text):
+    # Name of the function whose output differs from the reference, or None
+    reference = textCleaning.referenceCleanText(text)
+    if textCleaning.cleanText(text) != reference:
+        return 'cleanText'
+    if textCleaning.cleanTextWithOffsets(text)[0] != reference:
+        return 'cleanTextWithOffsets'
+    return None
+
+def checkCleaningEquivalence(randomStrings=20000, seed=0):
+    # Untimed: every code point between letters, spaces and itself, then
+    # random mixed strings, against referenceCleanText
+    print("Cleaning equivalence (cleanText, cleanTextWithOffsets vs reference)")
+    print("=" * 60)
+    mismatches = []
+    batchSize = 2048
+    for start in range(0, sys.maxunicode + 1, batchSize):
+        codePoints = range(start, min(start + batchSize, sys.maxunicode + 1))
+        if cleaningMismatch(''.join(f"a{chr(c)}b {chr(c)}{chr(c)} " for c in codePoints)):
+            # Narrow the batch down to the failing code points
+            mismatches.extend(f"U+{c:04X}" for c in codePoints
+                              if cleaningMismatch(f"a{chr(c)}b {chr(c)}{chr(c)} "))
+    printRow("code points", sys.maxunicode + 1, f"({len(mismatches)} different)")
+
+    generator = random.Random(seed)
+    different = 0
+    for _ in range(randomStrings):
+        text = ''.join(generator.choice(EQUIVALENCE_ALPHABET) for _ in range(generator.randint(0, 40)))
+        function = cleaningMismatch(text)
+        if function:
+            different += 1
+            mismatches.append(f"{function} {text!r}")
+    printRow("random strings", randomStrings, f"({different} different)")
+
+    for mismatch in mismatches[:10]:
+        print(f"  DIFFERENT: {mismatch}")
+    return not mismatches
+
+# Search corpora: alphabet, pattern lengths and match densities
+SEARCH_ALPHABETS = {
+    'english-like': 'etaoinshrdlucmfwypvbgkjqxz',
+    'dna': 'acgt',
+    'binary': 'ab',
+}
+PATTERN_LENGTHS = (3, 12, 40)
+MATCH_DENSITIES = {'none': 0, 'sparse': 10, 'dense': 1000}  # Planted matches per MB
+
+def plantPatterns(text, patterns, perMB):
+    # Overwrites the text with the patterns in turn at evenly spread
+    # positions, each pattern ends up perMB times per MB
+    if not perMB:
+        return text
+    count = max(1, int(len(text) / MB * perMB)) * len(patterns)
+    step = len(text) // count
+    parts = []
+    for number, start in enumerate(range(0, count * step, step)):
+        pattern = patterns[number % len(patterns)]
+        parts.append(text[start:start + step - len(pattern)])
+        parts.append(pattern)
+    parts.append(text[count * step:])
+    return ''.join(parts)
+
+def absentPattern(alphabet, length):
+    # Digits never appear in the generated corpora, so this never matches
+    return (alphabet * length)[:length - 1] + '9'
+
+def benchmarkSearch(sizeMB=1, repeats=3, results=None):
+    print(f"Search ({sizeMB} MB per corpus, best of {repeats})")
+    print("=" * 60)
+    results = {} if results is None else results
+    generator = random.Random(1)
+    for corpusName, alphabet in SEARCH_ALPHABETS.items():
+        baseText = textCleaning.cleanText(generateText(int(sizeMB * MB), alphabet))
+        patterns = [''.join(generator.choice(alphabet) for _ in range(length))
+                    for length in PATTERN_LENGTHS]
+        for densityName, perMB in MATCH_DENSITIES.items():
+            # One text (and suffix array) per density holds every pattern
+            text = plantPatterns(baseText, patterns, perMB)
+            suffixArray = measure(results, f"search/{corpusName}/{densityName}/build suffix array",
+                                  patternSearching.buildSuffixArray, text,
+                                  sizeBytes=len(text), repeats=1, traceMemory=False)
+            for pattern in patterns:
+                query = pattern if perMB else absentPattern(alphabet, len(pattern))
+                name = f"search/{corpusName}/{densityName}/m={len(pattern)}"
+                printRow(name, f"{len(patternSearching.kmp(query, text))}", "matches")
+                measure(results, f"{name}/kmp", patternSearching.kmp, query, text,
+                        sizeBytes=len(text), repeats=repeats)
+                measure(results, f"{name}/z", patternSearching.findOccurrences, query, text,
+                        sizeBytes=len(text), repeats=repeats)
+                measure(results, f"{name}/suffix array", patternSearching.suffixArraySearch,
+                        query, text, suffixArray, sizeBytes=len(text), repeats=repeats)
+                measure(results, f"{name}/kmp count", patternSearching.kmpCount, query, text,
+                        sizeBytes=len(text), repeats=repeats)
+    return results
+
+def buildTrie(cleanedText):
+    vocabulary = textCleaning.buildVocabulary(textCleaning.separateWords(cleanedText))
+    return autocompletion.Trie.fromWords(vocabulary)
+
+def insertWords(words):
+    # Word by word insertion, the reference for the Trie bulk load
+    trie = autocompletion.Trie()
+    for word in words:
+        trie.insert(word)
+    return trie
+
+def suggestAll(trie, prefixes, limit=6, fuzzy=False):
+    return [trie.getSuggestions(prefix, limit, fuzzy=fuzzy) for prefix in prefixes]
+
+def misspell(word, generator):
+    # One random substitution, deletion or insertion
+    position = generator.randrange(len(word))
+    letter = generator.choice('abcdefghijklmnopqrstuvwxyz')
+    return generator.choice([word[:position] + letter + word[position + 1:],
+                             word[:position] + word[position + 1:],
+                             word[:position] + letter + word[position:]])
+
+def retainedBytes(function, *args):
+    # Memory still allocated when the function returns (kept by its result)
+    tracemalloc.start()
+    try:
+        result = function(*args)  # Kept alive until the memory is read
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+TRIE_LAYOUTS = {'trie': autocompletion.Trie, 'compact trie': autocompletion.CompactTrie}
+VOCABULARY_SCALES = (0.25, 0.5, 1, 2)  # Text sizes, relative to --size
+
+def benchmarkIndexes(sizeMB=1, repeats=3, results=None):
+    print(f"Indexes ({sizeMB} MB of text, best of {repeats})")
+    print("=" * 60)
+    results = {} if results is None else results
+    text = generateText(int(sizeMB * MB), CLEANING_CORPORA['accented latin'])
+    cleanedText = textCleaning.cleanText(text)
+    sizeBytes = len(cleanedText)
+    measure(results, "indexes/word index", wordIndex.WordIndex, cleanedText,
+            sizeBytes=sizeBytes, repeats=repeats)
+    # Tracing SA-IS allocations makes it ~35x slower, its memory is not traced
+    measure(results, "indexes/suffix array", patternSearching.buildSuffixArray, cleanedText,
+            sizeBytes=sizeBytes, repeats=1, traceMemory=False)
+    measure(results, "indexes/offset map", textCleaning.cleanTextWithOffsets, text,
+            sizeBytes=len(text.encode('utf-8')), repeats=repeats)
+    measure(results, "indexes/autocomplete trie", buildTrie, cleanedText,
+            sizeBytes=sizeBytes, repeats=repeats)
+
+    # Both autocomplete layouts: build, memory kept, exact and fuzzy queries
+    vocabulary = textCleaning.buildVocabulary(textCleaning.separateWords(cleanedText))
+    generator = random.Random(4)
+    # Top-6 suggestions for 1 to 3 letter prefixes of random words (as typed)
+    prefixes = [word[:length] for word in generator.sample(sorted(vocabulary), 300)
+                for length in (1, 2, 3)]
+    # Fuzzy suggestions (1 error) for misspelled words of 5+ letters
+    longWords = [word for word in sorted(vocabulary) if len(word) >= 5]
+    queries = [misspell(word, generator) for word in generator.sample(longWords, 200)]
+    printRow("  distinct words", len(vocabulary))
+    for layoutName, layout in TRIE_LAYOUTS.items():
+        name = f"indexes/autocomplete/{layoutName}"
+        trie = measure(results, f"{name}/build", layout.fromWords, vocabulary,
+                       sizeBytes=sizeBytes, repeats=repeats)
+        results[f"{name}/build"]['retainedBytes'] = retainedBytes(layout.fromWords, vocabulary)
+        printRow("  memory kept", f"{results[f'{name}/build']['retainedBytes'] / MB:.1f}", "MB")
+        measure(results, f"{name}/suggestions", suggestAll, trie, prefixes)
+        perPrefix = results[f"{name}/suggestions"]['seconds'] / len(prefixes)
+        printRow("  per prefix", f"{perPrefix * 1e6:.0f}", "us")
+        measure(results, f"{name}/fuzzy suggestions", suggestAll, trie, queries, 6, True)
+        perQuery = results[f"{name}/fuzzy suggestions"]['seconds'] / len(queries)
+        printRow("  per query", f"{perQuery * 1e6:.0f}", "us")
+    # Binary form kept in the disk cache: what reopening a known document costs
+    data = measure(results, "indexes/autocomplete/compact trie/serialize",
+                   trie.toBytes, repeats=repeats)
+    printRow("  serialized size", f"{len(data) / MB:.1f}", "MB")
+    measure(results, "indexes/autocomplete/compact trie/reload",
+            autocompletion.CompactTrie.fromBuffer, data, repeats=repeats)
+
+    uniqueWords = textCleaning.identifyUniqueWords(textCleaning.separateWords(cleanedText))
+    measure(results, "indexes/trie insert", insertWords, uniqueWords,
+            sizeBytes=sizeBytes, repeats=repeats)
+    measure(results, "indexes/trie bulk load", autocompletion.Trie.fromWords, uniqueWords,
+            sizeBytes=sizeBytes, repeats=repeats)
+
+    # Vocabulary build should scale linearly: the time per word stays flat
+    for scale in VOCABULARY_SCALES:
+        scaledText = textCleaning.cleanText(generateText(int(sizeMB * scale * MB),
+                                                         CLEANING_CORPORA['accented latin'], seed=2))
+        words = textCleaning.separateWords(scaledText)
+        name = f"indexes/vocabulary/x{scale:g}"
+        vocabulary = measure(results, name, textCleaning.buildVocabulary, words,
+                             sizeBytes=len(scaledText), repeats=repeats)
+        printRow("  words / distinct", f"{len(words)} / {len(vocabulary)}")
+        printRow("  per word", f"{results[name]['seconds'] / len(words) * 1e9:.0f}", "ns")
+    return results
+
+# Extraction fixtures --------------------------------------------------
+
+def writePlainFixtures(directory, text):
+    lines = text.split('\n')
+    fixtures = {
+        'fixture.txt': text,
+        'fixture.md': '\n'.join(f"# {line}" if i % 20 == 0 else line for i, line in enumerate(lines)),
+        'fixture.csv': '\n'.join(','.join(line.split()[:8]) for line in lines),
+        'fixture.json': json.dumps({'lines': lines}, indent=1),
+        'fixture.py': '\n'.join(f"# {line}" for line in lines),
+    }
+    for fileName, content in fixtures.items():
+        with open(os.path.join(directory, fileName), 'w', encoding='utf-8') as file:
+            file.write(content)
+    return list(fixtures)
+
+def writePdfFixture(path, lines, linesPerPage=50):
+    # Minimal text-only PDF written by hand, no PDF library needed
+    pages = [lines[i:i + linesPerPage] for i in range(0, len(lines), linesPerPage)] or [[]]
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pageIds = []
+    for pageLines in pages:
+        escaped = (line.encode('latin-1', 'replace').replace(b'\\', b'\\\\')
+                   .replace(b'(', b'\\(').replace(b')', b'\\)') for line in pageLines)
+        stream = b"BT /F1 10 Tf 12 TL 40 800 Td " + b''.join(b"(" + line + b") ' " for line in escaped) + b"ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        pageIds.append(len(objects))
+    objects[1] = (b"<< /Type /Pages /Kids [" + b' '.join(b"%d 0 R" % pageId for pageId in pageIds)
+                  + b"] /Count %d >>" % len(pageIds))
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b''.join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+def writeOfficeFixtures(directory, lines):
+    # Built with the same libraries used to read them, skipped when missing
+    fixtures = []
+    try:
+        document = textExtraction.importBackend('docx').Document()
+        for line in lines:
+            document.add_paragraph(line)
+        document.save(os.path.join(directory, 'fixture.docx'))
+        fixtures.append('fixture.docx')
+    except textExtraction.MissingDependencyError as e:
+        printRow("fixture.docx", "skipped", f"({e.args[0].split(',')[0]})")
+    try:
+        workbook = textExtraction.importBackend('openpyxl').Workbook()
+        sheet = workbook.active
+        for line in lines:
+            sheet.append(line.split()[:10])
+        workbook.save(os.path.join(directory, 'fixture.xlsx'))
+        fixtures.append('fixture.xlsx')
+    except textExtraction.MissingDependencyError as e:
+        printRow("fixture.xlsx", "skipped", f"({e.args[0].split(',')[0]})")
+    try:
+        presentation = textExtraction.importBackend('pptx').Presentation()
+        for start in range(0, len(lines), 20):
+            slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+            slide.placeholders[1].text = '\n'.join(lines[start:start + 20])
+        presentation.save(os.path.join(directory, 'fixture.pptx'))
+        fixtures.append('fixture.pptx')
+    except textExtraction.MissingDependencyError as e:
+        printRow("fixture.pptx", "skipped", f"({e.args[0].split(',')[0]})")
+    return fixtures
+
+def loadCold(filePath):
+    # Empty disk cache: hash, extract, clean and store the entry
+    diskCache.clear()
+    diskCache.fileHashes.clear()
+    return documentCache.documentCache.loadFromDisk(filePath)
+
+PDF_FIXTURE_PAGES = 10  # pdfplumber is slow, the PDF fixture is capped
+
+def benchmarkExtraction(sizeMB=1, repeats=3, results=None):
+    print(f"Extraction ({sizeMB} MB of text per fixture, best of {repeats})")
+    print("=" * 60)
+    results = {} if results is None else results
+    text = generateText(int(sizeMB * MB), CLEANING_CORPORA['ascii prose'])
+    lines = [line for line in text.split('\n') if line.strip()]
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        fixtures = writePlainFixtures(tempDir, text)
+        writePdfFixture(os.path.join(tempDir, 'fixture.pdf'), lines[:PDF_FIXTURE_PAGES * 50])
+        fixtures.append('fixture.pdf')
+        fixtures += writeOfficeFixtures(tempDir, lines)
+
+        # The disk cache is pointed at an empty directory for cold/warm runs
+        cacheDir, cacheEnabled = diskCache.CACHE_DIR, diskCache.enabled
+        diskCache.CACHE_DIR = os.path.join(tempDir, 'cache')
+        diskCache.enabled = True
+        try:
+            for fileName in fixtures:
+                filePath = os.path.join(tempDir, fileName)
+                sizeBytes = os.path.getsize(filePath)
+                try:
+                    measure(results, f"extraction/{fileName}", textExtraction.extractByFormat,
+                            filePath, sizeBytes=sizeBytes, repeats=repeats)
+                except textExtraction.MissingDependencyError as e:
+                    printRow(f"extraction/{fileName}", "skipped", f"({e.args[0].split(',')[0]})")
+                    continue
+                if not textExtraction.isDiskCached(filePath):
+                    continue  # Plain text is always read directly
+                measure(results, f"extraction/{fileName}/cache cold", loadCold, filePath,
+                        sizeBytes=sizeBytes, repeats=1, traceMemory=False)
+                measure(results, f"extraction/{fileName}/cache warm",
+                        documentCache.documentCache.loadFromDisk, filePath,
+                        sizeBytes=sizeBytes, repeats=repeats)
+        finally:
+            diskCache.CACHE_DIR, diskCache.enabled = cacheDir, cacheEnabled
+    return results
+
+# Baselines ------------------------------------------------------------
+
+def saveBaseline(path, results):
+    baseline = {'version': BASELINE_VERSION, 'python': platform.python_version(),
+                'machine': platform.machine(), 'results': results}
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, indent=1, sort_keys=True)
+    print(f"\nBaseline saved to {path} ({len(results)} measurements)")
+
+def compareBaseline(path, results, tolerance=0.2):
+    # True when no measurement is slower than the baseline beyond tolerance
+    with open(path, encoding='utf-8') as file:
+        baseline = json.load(file)
+    if baseline.get('version') != BASELINE_VERSION:
+        raise ValueError(f"{path} is not a baseline of this benchmark version")
+
+    print(f"\nCompared with {path} (tolerance {tolerance:.0%})")
+    print("=" * 60)
+    regressions = 0
+    for name, record in results.items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['seconds']:
+            continue
+        ratio = record['seconds'] / previous['seconds']
+        if ratio > 1 + tolerance:
+            regressions += 1
+            printRow(name, f"{ratio:.2f}x", "slower  REGRESSION")
+        elif ratio < 1 - tolerance:
+            printRow(name, f"{1 / ratio:.2f}x", "faster")
+    printRow("regressions", regressions)
+    return regressions == 0
+
+# Main -----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Text Searching Tool benchmarks.")
+    parser.add_argument('benchmark',
+                        choices=['startup', 'cleaning', 'equivalence', 'search', 'indexes',
+                                 'extraction', 'all'])
+    parser.add_argument('--repeats', type=int, default=None,
+                        help="runs per measurement, the best one is kept (default: 5 startup, 3 others)")
+    parser.add_argument('--size', type=float, default=None,
+                        help="corpus size in MB (default: 4 cleaning, 1 others)")
+    parser.add_argument('--save-baseline', metavar='FILE', help="save the results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='FILE', help="compare the results with a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="slowdown ratio reported as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    status = 0
+    # The equivalence check runs last: it fills the cleaning caches with every code point
+    selected = (['cleaning', 'search', 'indexes', 'extraction', 'equivalence']
+                if args.benchmark == 'all' else [args.benchmark])
+    for benchmark in selected:
+        repeats = args.repeats or (5 if benchmark == 'startup' else 3)
+        if benchmark == 'startup':
+            benchmarkStartup(repeats)
+        elif benchmark == 'cleaning':
+            if not benchmarkCleaning(args.size or 4, repeats, results):
+                status = 1
+        elif benchmark == 'equivalence':
+            if not checkCleaningEquivalence():
+                status = 1
+        elif benchmark == 'search':
+            benchmarkSearch(args.size or 1, repeats, results)
+        elif benchmark == 'indexes':
+            benchmarkIndexes(args.size or 1, repeats, results)
+        elif benchmark == 'extraction':
+            benchmarkExtraction(args.size or 1, repeats, results)
+        print()
+
+    if args.save_baseline:
+        saveBaseline(args.save_baseline, results)
+    if args.baseline and not compareBaseline(args.baseline, results, args.tolerance):
+        status = 1
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
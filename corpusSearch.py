@@ -0,0 +1,93 @@
+"""
+Corpus search across many files:
+- Inputs can be files, directories (searched recursively) or glob patterns
+- Extraction and searching are CPU-bound (pdfplumber, python-docx...) so
+files are spread across a process pool to use every core
+- Results are yielded per file as soon as each one finishes
+- 'count' and 'exists' modes keep results small (no position lists), so
+thousands of files can be scanned cheaply
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import textExtraction
+import patternSearching
+from backgroundTasks import checkCancelled
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import os
+
+# Functions ------------------------------------------------------------
+
+def isSupportedFile(filePath):
+    return os.path.isfile(filePath) and filePath.endswith(textExtraction.SUPPORTED_EXTENSIONS)
+
+def expandPaths(items):
+    # Files, directories and glob patterns -> unique supported file paths
+    filePaths = []
+    for item in items:
+        if os.path.isdir(item):
+            for directory, _, fileNames in os.walk(item):
+                for fileName in sorted(fileNames):
+                    filePaths.append(os.path.join(directory, fileName))
+        elif glob.has_magic(item):
+            filePaths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            filePaths.append(item)
+
+    return [filePath for filePath in dict.fromkeys(filePaths) if isSupportedFile(filePath)]
+
+def searchFile(filePath, pattern, algorithmSelected=1, wholeWords=False, mode='all', limit=None):
+    # Runs inside a worker process, errors are reported instead of raised
+    result = {'filePath': filePath, 'occurrences': [], 'count': 0, 'executionTime': 0.0,
+              'error': None}
+    try:
+        if mode == 'count':
+            result['count'], result['executionTime'] = patternSearching.countText(
+                filePath, pattern, algorithmSelected, wholeWords=wholeWords)
+        else:
+            if mode == 'exists':
+                limit = 1
+            elif mode == 'all':
+                limit = None
+            occurrences, executionTime, _ = patternSearching.searchText(
+                filePath, pattern, algorithmSelected, wholeWords=wholeWords, limit=limit)
+            result['occurrences'] = occurrences
+            result['count'] = len(occurrences)
+            result['executionTime'] = executionTime
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def initWorker():
+    # Files are already spread across processes, PDF pages stay in-process
+    textExtraction.PDF_PAGE_WORKERS = 1
+
+def searchCorpus(filePaths, pattern, algorithmSelected=1, wholeWords=False,
+                 maxWorkers=None, cancelEvent=None, mode='all', limit=None):
+    # Yields one result per file in completion order, with running totals
+    executor = ProcessPoolExecutor(max_workers=maxWorkers, initializer=initWorker,
+                                   mp_context=textExtraction.processPoolContext())
+    finished = False
+    try:
+        futures = [executor.submit(searchFile, filePath, pattern, algorithmSelected, wholeWords,
+                                   mode, limit)
+                   for filePath in filePaths]
+        totalMatches = 0
+        for filesSearched, future in enumerate(as_completed(futures), start=1):
+            checkCancelled(cancelEvent)
+            result = future.result()
+            totalMatches += result['count']
+            result['filesSearched'] = filesSearched
+            result['filesTotal'] = len(futures)
+            result['totalMatches'] = totalMatches
+            yield result
+        finished = True
+    finally:
+        if finished:
+            # Workers are joined, exiting right after does not race their teardown
+            executor.shutdown(wait=True)
+        else:
+            # Pending files are dropped when the caller stops early or cancels
+            executor.shutdown(wait=False, cancel_futures=True)
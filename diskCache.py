@@ -0,0 +1,167 @@
+"""
+Persistent on-disk extraction cache:
+- Content-addressed: entries are keyed by the SHA-256 hash of the file
+bytes, so renamed or copied files still hit the cache
+- Each entry holds compressed text plus the versions it was built with,
+stale entries are ignored by the callers that check those versions
+- Binary entries (e.g. the autocomplete trie) are stored next to them
+under the same hash and read back through a read-only memory map
+- Total size is capped, least recently used entries are evicted first,
+a running total avoids scanning the cache directory on every write
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import zlib
+
+# Configuration --------------------------------------------------------
+
+CACHE_FORMAT_VERSION = 1
+CACHE_DIR = os.environ.get('TEXT_SEARCH_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'textSearchingTool'))
+MAX_CACHE_BYTES = 1024 * 1024 * 1024  # 1 GB
+COMPRESSION_LEVEL = 1  # Fastest zlib level, entries are written on every cold load
+EVICTION_TARGET = 0.9  # Eviction frees space down to this fraction of the cap
+ENTRY_SUFFIX = '.entry'
+TRIE_SUFFIX = '.trie'
+CACHE_SUFFIXES = (ENTRY_SUFFIX, TRIE_SUFFIX)
+enabled = os.environ.get('TEXT_SEARCH_CACHE', '1') != '0'
+
+# Functions ------------------------------------------------------------
+
+fileHashes = {}  # (path, mtime, size) -> hash, avoids re-reading unchanged files
+cacheBytes = None  # Running estimate of the cache size, None until scanned
+
+def hashFile(filePath, blockSize=1024 * 1024):
+    stat = os.stat(filePath)
+    key = (os.path.abspath(filePath), stat.st_mtime_ns, stat.st_size)
+    if key in fileHashes:
+        return fileHashes[key]
+
+    digest = hashlib.sha256()
+    with open(filePath, 'rb') as file:
+        for block in iter(lambda: file.read(blockSize), b''):
+            digest.update(block)
+
+    if len(fileHashes) >= 1024:
+        fileHashes.clear()
+    fileHashes[key] = digest.hexdigest()
+    return fileHashes[key]
+
+def entryPath(fileHash, suffix=ENTRY_SUFFIX):
+    return os.path.join(CACHE_DIR, fileHash + suffix)
+
+def load(fileHash):
+    if not enabled:
+        return None
+    path = entryPath(fileHash)
+    try:
+        with open(path, 'rb') as file:
+            entry = json.loads(zlib.decompress(file.read()))
+        os.utime(path)  # Mark as recently used for eviction
+    except (OSError, ValueError, zlib.error):
+        return None
+    if entry.get('formatVersion') != CACHE_FORMAT_VERSION:
+        return None
+    return entry
+
+# Field -> fields derived from it, dropped when it is rewritten without them
+DERIVED_FIELDS = {'extractionVersion': ('cleaningVersion', 'cleanedText')}
+
+def store(fileHash, merge=True, **fields):
+    # Merge fields into the existing entry (e.g. cleaned text added later),
+    # merge=False writes the fields as the whole entry without reading it
+    if not enabled:
+        return
+    entry = (load(fileHash) or {}) if merge else {}
+    # A new extraction invalidates the cleaned text of the old one, even if
+    # the process exits before the new cleaned text is stored
+    for field, derivedFields in DERIVED_FIELDS.items():
+        if field in fields:
+            for derived in derivedFields:
+                if derived not in fields:
+                    entry.pop(derived, None)
+    entry.update(fields)
+    entry['formatVersion'] = CACHE_FORMAT_VERSION
+    data = zlib.compress(json.dumps(entry).encode('utf-8'), COMPRESSION_LEVEL)
+    writeEntry(entryPath(fileHash), data)
+
+def writeEntry(path, data):
+    global cacheBytes
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        try:
+            previousSize = os.path.getsize(path)
+        except OSError:
+            previousSize = 0
+        # Write to a temporary file first so readers never see partial entries
+        fd, tempPath = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tempPath, path)
+    except OSError:
+        return
+
+    # The directory is only scanned once, then when the running total
+    # passes the cap (the scan also corrects writes by other processes)
+    if cacheBytes is not None:
+        cacheBytes += len(data) - previousSize
+    if cacheBytes is None:
+        evict()
+    elif cacheBytes > MAX_CACHE_BYTES:
+        # Below the cap, so the next writes don't trigger a scan each
+        evict(int(MAX_CACHE_BYTES * EVICTION_TARGET))
+
+def storeBinary(fileHash, suffix, data):
+    if enabled:
+        writeEntry(entryPath(fileHash, suffix), data)
+
+def mapBinary(fileHash, suffix):
+    # Read-only memory map of a binary entry, None if there is none
+    if not enabled:
+        return None
+    path = entryPath(fileHash, suffix)
+    try:
+        with open(path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        os.utime(path)  # Mark as recently used for eviction
+    except (OSError, ValueError):  # ValueError: empty file
+        return None
+    return mapped
+
+def evict(maxBytes=None):
+    global cacheBytes
+    maxBytes = MAX_CACHE_BYTES if maxBytes is None else maxBytes
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    entries = []
+    for name in names:
+        if name.endswith(CACHE_SUFFIXES):
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Removed meanwhile (e.g. by another process)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    totalBytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):  # Oldest first
+        if totalBytes <= maxBytes:
+            break
+        try:
+            os.remove(path)
+            totalBytes -= size
+        except OSError:
+            pass
+    cacheBytes = totalBytes
+
+def clear():
+    evict(maxBytes=0)
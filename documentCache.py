@@ -0,0 +1,243 @@
+"""
+In-memory document cache:
+- Keeps extracted and cleaned text of recently loaded files
+- Entries are keyed by file path, modification time and size, so an
+edited file is extracted again automatically
+- LRU eviction bounded by the total bytes held in the cache
+- Optional search indexes are built lazily and stored with the document
+- Locators (page, slide, sheet/cell) and the offset map back to the
+original text are kept to report where matches are
+- Misses fall back to the persistent disk cache before extracting
+- Cache hits, cleaning and index builds are recorded as instrumentation
+spans/counters
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import textExtraction
+import textCleaning
+import diskCache
+import instrumentation
+from backgroundTasks import checkCancelled, reportProgress
+import os
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# Classes & Functions --------------------------------------------------
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+
+class CachedDocument:
+    def __init__(self, filePath, extractedText, cleanedText, segments=None):
+        self.filePath = filePath
+        self.extractedText = extractedText
+        self.cleanedText = cleanedText
+        # Locators from (original offset, label) segments: offsets packed in
+        # an array, labels (page, slide, sheet/cell...) in a parallel list
+        segments = segments or []
+        self.segmentOffsets = array('q', (offset for offset, _ in segments))
+        self.segmentLabels = [label for _, label in segments]
+        self.segmentBytes = (sys.getsizeof(self.segmentOffsets) + sys.getsizeof(self.segmentLabels)
+                             + sum(sys.getsizeof(label) for label in self.segmentLabels))
+        self.offsetMap = None
+        self.lineBreaks = None  # Offsets of '\n' in the original text (line locators)
+        self.indexes = {}  # name -> search index built over the cleaned text
+        self.cache = None  # Cache holding the document, charged for index memory
+
+    def getIndex(self, name, build):
+        # build(cleanedText) only runs the first time an index is requested
+        if name not in self.indexes:
+            with instrumentation.span(f"index: {name}", len(self.cleanedText)):
+                self.indexes[name] = build(self.cleanedText)
+            if self.cache:
+                self.cache.recharge(self)
+        return self.indexes[name]
+
+    def getOffsetMap(self):
+        # Only built when a match has to be located in the original text
+        if self.offsetMap is None:
+            with instrumentation.span("offset map", len(self.extractedText)):
+                self.offsetMap = textCleaning.cleanTextWithOffsets(self.extractedText)[1]
+            if self.cache:
+                self.cache.recharge(self)
+        return self.offsetMap
+
+    def getLineBreaks(self):
+        # Built once (on the worker with the offset map), then every line
+        # number is a bisection instead of counting from the start
+        if self.lineBreaks is None:
+            with instrumentation.span("line index", len(self.extractedText)):
+                self.lineBreaks = array('q', (match.start() for match
+                                              in re.finditer('\n', self.extractedText)))
+            if self.cache:
+                self.cache.recharge(self)
+        return self.lineBreaks
+
+    def locate(self, originalOffset):
+        # Page/slide/cell label of an original offset, line number otherwise
+        if self.segmentLabels:
+            segment = bisect_right(self.segmentOffsets, originalOffset) - 1
+            return self.segmentLabels[max(segment, 0)]
+        lineNumber = bisect_left(self.getLineBreaks(), originalOffset) + 1
+        return f"line {lineNumber}"
+
+    def sizeInBytes(self):
+        size = sys.getsizeof(self.extractedText) + sys.getsizeof(self.cleanedText)
+        size += self.segmentBytes  # Label strings included (~60 bytes per cell/page)
+        if self.offsetMap is not None:
+            size += self.offsetMap.sizeInBytes()
+        if self.lineBreaks is not None:
+            size += sys.getsizeof(self.lineBreaks)
+        for index in self.indexes.values():
+            if hasattr(index, 'sizeInBytes'):
+                size += index.sizeInBytes()
+            else:
+                size += sys.getsizeof(index)
+        return size
+
+class DocumentCache:
+    def __init__(self, maxBytes=DEFAULT_MAX_BYTES):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()  # key -> CachedDocument (oldest first)
+        self.sizes = {}  # key -> bytes charged for the entry
+        self.totalBytes = 0
+        self.lock = threading.RLock()  # GUI worker threads share the cache
+        self.loading = {}  # key -> Event set when the load in progress ends
+
+    def makeKey(self, filePath):
+        # Path + mtime + size identify one version of a file
+        stat = os.stat(filePath)
+        return (os.path.abspath(filePath), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, filePath):
+        key = self.makeKey(filePath)
+        with self.lock:
+            document = self.entries.get(key)
+            if document is not None:
+                self.entries.move_to_end(key)  # Mark as most recently used
+        return document
+
+    def put(self, filePath, document):
+        key = self.makeKey(filePath)
+        with self.lock:
+            self.discardPath(key[0])  # Older versions of the same file are stale
+
+            self.entries[key] = document
+            self.sizes[key] = document.sizeInBytes()
+            self.totalBytes += self.sizes[key]
+            document.cache = self
+            self.evict()
+
+    def recharge(self, document):
+        # Called when a document grows, e.g. after building an index for it
+        with self.lock:
+            for key, cached in self.entries.items():
+                if cached is document:
+                    self.totalBytes += document.sizeInBytes() - self.sizes[key]
+                    self.sizes[key] = document.sizeInBytes()
+            self.evict()
+
+    def discardPath(self, absolutePath):
+        for key in [key for key in self.entries if key[0] == absolutePath]:
+            self.remove(key)
+
+    def remove(self, key):
+        self.entries.pop(key).cache = None
+        self.totalBytes -= self.sizes.pop(key)
+
+    def evict(self):
+        # Drop least recently used entries until the byte budget is met,
+        # always keeping the newest entry even if it is over budget alone
+        while self.totalBytes > self.maxBytes and len(self.entries) > 1:
+            oldestKey = next(iter(self.entries))
+            self.remove(oldestKey)
+
+    def clear(self):
+        with self.lock:
+            for document in self.entries.values():
+                document.cache = None
+            self.entries.clear()
+            self.sizes.clear()
+            self.totalBytes = 0
+
+    def loadDocument(self, filePath, cancelEvent=None, progress=None):
+        while True:
+            document = self.get(filePath)
+            if document is not None:
+                instrumentation.count("document cache hits")
+                return document
+
+            # A file being loaded by another thread (e.g. a search started
+            # while the file is still opening) is waited for, not extracted twice
+            key = self.makeKey(filePath)
+            with self.lock:
+                loaded = self.loading.get(key)
+                if loaded is None:
+                    loaded = self.loading[key] = threading.Event()
+                    break
+            reportProgress(progress, "Waiting for the file to load")
+            while not loaded.wait(0.1):
+                checkCancelled(cancelEvent)
+            # Loaded now (a hit), or the other load failed and this one retries
+
+        try:
+            instrumentation.count("document cache misses")
+            with instrumentation.span("load document", os.path.getsize(filePath)):
+                extractedText, cleanedText, segments = self.loadFromDisk(filePath, cancelEvent,
+                                                                         progress)
+            document = CachedDocument(filePath, extractedText, cleanedText, segments)
+            self.put(filePath, document)
+        finally:
+            with self.lock:
+                del self.loading[key]
+            loaded.set()
+        return document
+
+    def loadFromDisk(self, filePath, cancelEvent=None, progress=None):
+        segments = []
+        if not textExtraction.isDiskCached(filePath):
+            reportProgress(progress, "Reading file")
+            extractedText = textExtraction.extractDocument(filePath, cancelEvent, progress,
+                                                           segments)
+            return extractedText, self.clean(extractedText, progress), segments
+
+        with instrumentation.span("disk cache lookup"):
+            fileHash = diskCache.hashFile(filePath)
+            entry = diskCache.load(fileHash)
+        extractionCached = entry and entry.get('extractionVersion') == textExtraction.EXTRACTION_VERSION
+        if extractionCached and entry.get('cleaningVersion') == textCleaning.CLEANING_VERSION:
+            instrumentation.count("disk cache hits")
+            segments = [tuple(segment) for segment in entry['segments']]
+            return entry['extractedText'], entry['cleanedText'], segments
+
+        # Extraction itself is cached too, only the cleaning may be outdated
+        if extractionCached:
+            instrumentation.count("extraction cache hits")
+            extractedText = entry['extractedText']
+            segments = [tuple(segment) for segment in entry['segments']]
+        else:
+            extractedText = textExtraction.extractDocument(filePath, cancelEvent, progress,
+                                                           segments)
+        cleanedText = self.clean(extractedText, progress)
+        # One write with everything, instead of storing the extraction and
+        # then reading, merging and rewriting it with the cleaned text
+        diskCache.store(fileHash, merge=False, extractionVersion=textExtraction.EXTRACTION_VERSION,
+                        extractedText=extractedText, segments=segments,
+                        cleaningVersion=textCleaning.CLEANING_VERSION, cleanedText=cleanedText)
+        return extractedText, cleanedText, segments
+
+    def clean(self, extractedText, progress=None):
+        reportProgress(progress, "Cleaning text")
+        with instrumentation.span("cleaning", len(extractedText)):
+            return textCleaning.cleanText(extractedText)
+
+# Shared cache used by the search engine and the GUI
+documentCache = DocumentCache()
+
+def loadDocument(filePath, cancelEvent=None, progress=None):
+    return documentCache.loadDocument(filePath, cancelEvent, progress)
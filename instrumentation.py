@@ -0,0 +1,131 @@
+"""
+Per-stage timing instrumentation:
+- span(name, bytesProcessed) context managers time each stage of a load
+or search (extraction, OCR, cleaning, indexing, searching...)
+- count(name) counters for events such as cache hits or OCR pages
+- Spans and counters go to the Recorder active on the current thread,
+with no recorder they cost a single attribute lookup
+- Recordings can be printed as a table or exported as JSON
+- Opt-in profiling of a single operation: cProfile (top functions) and
+tracemalloc (peak memory)
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Classes & Functions --------------------------------------------------
+
+activeRecorders = threading.local()  # Each worker thread records on its own
+
+def formatBytes(size):
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.2f} MB"
+
+class Recorder:
+    def __init__(self, name):
+        self.name = name
+        self.startTime = time.perf_counter()
+        self.totalTime = None  # Milliseconds, set when the recording ends
+        self.spans = []  # dicts: name, depth, start & duration (ms), bytes
+        self.counters = {}
+        self.depth = 0  # Nesting level of the span being recorded
+        self.profileText = None  # cProfile top functions (profile mode)
+        self.peakMemory = None  # tracemalloc peak in bytes (profile mode)
+
+    def addCount(self, name, amount):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def toDict(self):
+        return {'name': self.name, 'totalTime': self.totalTime, 'spans': self.spans,
+                'counters': self.counters, 'peakMemory': self.peakMemory,
+                'profile': self.profileText}
+
+    def toJson(self):
+        return json.dumps(self.toDict(), indent=1)
+
+    def summary(self):
+        # Text table of the stages, indented by nesting level
+        lines = [f"{self.name}: {self.totalTime or 0:.2f} ms total"]
+        for span in self.spans:
+            label = "  " * (span['depth'] + 1) + span['name']
+            line = f"{label:<32} {span['duration']:>10.2f} ms"
+            if span['bytes']:
+                line += f"  {formatBytes(span['bytes'])}"
+                if span['duration']:
+                    megabytesPerSecond = span['bytes'] / (1024 * 1024) / (span['duration'] / 1000)
+                    line += f" ({megabytesPerSecond:.1f} MB/s)"
+            lines.append(line)
+        for name, value in self.counters.items():
+            lines.append(f"  {name:<30} {value:>10}")
+        if self.peakMemory is not None:
+            lines.append(f"  {'peak memory':<30} {formatBytes(self.peakMemory):>13}")
+        if self.profileText:
+            lines.append("")
+            lines.append(self.profileText)
+        return '\n'.join(lines)
+
+def activeRecorder():
+    return getattr(activeRecorders, 'recorder', None)
+
+@contextmanager
+def span(name, bytesProcessed=None):
+    recorder = activeRecorder()
+    if recorder is None:
+        yield
+        return
+
+    record = {'name': name, 'depth': recorder.depth, 'bytes': bytesProcessed,
+              'start': (time.perf_counter() - recorder.startTime) * 1000, 'duration': None}
+    recorder.spans.append(record)  # Appended first so nested spans follow it
+    recorder.depth += 1
+    startTime = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['duration'] = (time.perf_counter() - startTime) * 1000  # Milliseconds
+        recorder.depth -= 1
+
+def count(name, amount=1):
+    recorder = activeRecorder()
+    if recorder is not None:
+        recorder.addCount(name, amount)
+
+@contextmanager
+def recording(name, profile=False, profileLimit=20):
+    # Records every span/counter of the operation run on this thread
+    recorder = Recorder(name)
+    previous = activeRecorder()
+    activeRecorders.recorder = recorder
+
+    profiler = None
+    tracingMemory = False
+    if profile:
+        # Profiling modules are only imported when used (startup time)
+        import cProfile
+        import tracemalloc
+        profiler = cProfile.Profile()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            tracingMemory = True
+        profiler.enable()
+    try:
+        yield recorder
+    finally:
+        if profiler:
+            import io
+            import pstats
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(profileLimit)
+            recorder.profileText = output.getvalue().strip()
+        if tracingMemory:
+            recorder.peakMemory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        recorder.totalTime = (time.perf_counter() - recorder.startTime) * 1000
+        activeRecorders.recorder = previous
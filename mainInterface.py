@@ -3,14 +3,24 @@
 import textExtraction
 import textCleaning
 import patternSearching
+import documentCache
+import corpusSearch
+import backgroundTasks
+import instrumentation
 
 import tkinter as tk
 from tkinterdnd2 import DND_FILES, TkinterDnD
 from tkinter import ttk, filedialog, messagebox, scrolledtext
+import json
 import os
+import re
+from bisect import bisect_right
+from itertools import accumulate
 
 # GUI ------------------------------------------------------------------
 
+PAGE_SIZE = 200  # Result rows rendered at a time
+
 class TextSearchingToolGUI:
     def __init__(self, root):
         self.root = root
@@ -18,8 +28,19 @@ class TextSearchingToolGUI:
         self.root.geometry("800x700")
         self.root.configure(bg='#f0f0f0')
         self.currentFilePath = None
+        self.corpusPaths = None  # Files searched together in corpus mode
         self.trie = None  # Store Trie for autocomplete
         self.suggestionListbox = None  # Store autocomplete listbox reference
+        self.taskRunner = backgroundTasks.TaskRunner(self.root)
+        self.loadTask = None  # Running file load (extraction + Trie build)
+        self.searchTask = None  # Running search
+        self.resultsHeader = ""  # Summary shown above the current page
+        self.resultsFooter = ""  # Messages shown below it (corpus files, errors, timings)
+        self.resultRowCount = 0  # Rows of the current results (one per match)
+        self.renderResultRows = None  # (start, stop) -> row strings
+        self.resultsPage = 0
+        self.loadTimings = None  # instrumentation.Recorder of the last file load
+        self.searchTimings = None  # instrumentation.Recorder of the last search
         self.createWidgets()
 
     def createWidgets(self):
@@ -54,6 +75,16 @@ class TextSearchingToolGUI:
         self.notebook.add(self.searchFrame, text="Text Search")
         self.createSearchTab()
 
+        # Status bar with progress of background work
+        statusFrame = ttk.Frame(self.root)
+        statusFrame.pack(fill='x', padx=20, pady=(0, 10))
+
+        self.statusLabel = ttk.Label(statusFrame, text="Ready.", font=('Arial', 9))
+        self.statusLabel.pack(side='left')
+
+        self.cancelButton = ttk.Button(statusFrame, text="Cancel", command=self.cancelTasks)
+        self.progressBar = ttk.Progressbar(statusFrame, mode='determinate', length=200)
+
         """# Help tab
         self.helpFrame = ttk.Frame(self.notebook)
         self.notebook.add(self.helpFrame, text="Help")
@@ -79,6 +110,12 @@ class TextSearchingToolGUI:
                                   text="Browse File",
                                   command=self.browseFile)
         browseButton.pack(side='left', padx=(0, 10))
+
+        # Browse folder button (corpus search)
+        browseFolderButton = ttk.Button(fileFrame,
+                                        text="Browse Folder",
+                                        command=self.browseFolder)
+        browseFolderButton.pack(side='left', padx=(0, 10))
         
         # Drag & Drop
         dropFrame = tk.Frame(mainFrame, 
@@ -88,7 +125,7 @@ class TextSearchingToolGUI:
         dropFrame.pack(fill='x', pady=(0, 10))
         
         dropLabel = tk.Label(dropFrame, 
-                            text="📁 Or drag & drop a file here.\n",
+                            text="📁 Or drag & drop a file here.\n(Drop several files or a folder to search them all.)",
                             font=('Arial', 11),
                             bg='#ecf0f1',
                             fg='#7f8c8d',
@@ -134,13 +171,13 @@ class TextSearchingToolGUI:
         )
         
         if filePath:
-            self.currentFilePath = filePath
-            self.filePathLabel.config(text=filePath, foreground="#00a105", font=('Arial', 10))
-            self.displayFileInfo(filePath)
-            self.buildTrie()  # Build Trie when file is loaded
-            self.refreshSearchTab()  # Rebuild search tab
-            messagebox.showinfo("Success.", f"Selected file:\n{filePath}")
+            self.loadFile(filePath)
             
+    def browseFolder(self):
+        folderPath = filedialog.askdirectory(title="Select a Folder", initialdir=".")
+        if folderPath:
+            self.loadCorpus([folderPath])
+
     def displayFileInfo(self, filePath):
         self.fileInfoText.config(state='normal')
         self.fileInfoText.delete('1.0', tk.END)
@@ -162,12 +199,15 @@ class TextSearchingToolGUI:
         self.fileInfoText.config(state='disabled')
         
     def handleDrop(self, event):
-        # Remove curly braces (tkinterdnd2 format)
-        filePath = event.data.strip('{}').strip()
+        # Split the Tcl list (tkinterdnd2 format, paths with spaces in braces)
+        droppedPaths = self.root.tk.splitlist(event.data)
 
-        # Handle multiple files (takes only the first one)
-        if '} {' in event.data:
-            filePath = event.data.split('} {')[0].strip('{}').strip()
+        # Several files or a folder are searched together
+        if len(droppedPaths) > 1 or os.path.isdir(droppedPaths[0]):
+            self.loadCorpus(droppedPaths)
+            return
+
+        filePath = droppedPaths[0]
         
         # Validate that file exists
         if not os.path.exists(filePath):
@@ -175,44 +215,121 @@ class TextSearchingToolGUI:
                                  f"File not found:\n{filePath}")
             return
             
-        supportedExtensions = ['.pdf', '.docx', '.xlsx', '.pptx', '.txt', 
-                               '.csv', '.json', '.yaml', '.xml', '.md', 
-                               '.html', '.py', '.js', '.java', '.c', 
-                               '.cpp', '.rb', '.sh']
-
-        fileExtension = os.path.splitext(filePath)[1].lower()
-        print(fileExtension)
-
-        if fileExtension not in supportedExtensions:
+        if not filePath.endswith(textExtraction.SUPPORTED_EXTENSIONS):
             messagebox.showerror("Error", 
                                  f"Unsupported file type.")
             return
         
         # Processing
+        self.loadFile(filePath)
+
+    def loadFile(self, filePath):
+        # A new file replaces whatever is still being loaded or searched
+        self.cancelTasks()
+
         self.currentFilePath = filePath
+        self.corpusPaths = None
+        self.trie = None
         self.filePathLabel.config(text=filePath, foreground="#00a105", font=('Arial', 10))
         self.displayFileInfo(filePath)
-        self.buildTrie()  # Build Trie when file is loaded
         self.refreshSearchTab()  # Rebuild search tab
-        messagebox.showinfo("Success.", f"Selected file:\n{os.path.basename(filePath)}")
-    
+        self.buildTrie()  # Build Trie when file is loaded
+
+    def loadCorpus(self, items):
+        self.cancelTasks()
+
+        filePaths = corpusSearch.expandPaths(items)
+        if not filePaths:
+            messagebox.showerror("Error", "No supported files found.")
+            return
+
+        self.currentFilePath = None
+        self.corpusPaths = filePaths
+        self.trie = None  # Autocomplete is only available for single files
+        self.filePathLabel.config(text=f"{len(filePaths)} files selected.",
+                                  foreground="#00a105", font=('Arial', 10))
+        self.displayCorpusInfo(filePaths)
+        self.refreshSearchTab()
+        self.showStatus("Ready.")
+
+    def displayCorpusInfo(self, filePaths):
+        self.fileInfoText.config(state='normal')
+        self.fileInfoText.delete('1.0', tk.END)
+
+        totalSize = sum(os.path.getsize(filePath) for filePath in filePaths)
+        info = f"Files: {len(filePaths)}\n"
+        info += f"Total Size: {totalSize/1024:.2f} KB\n\n"
+        info += '\n'.join(filePaths)
+
+        self.fileInfoText.insert('1.0', info)
+        self.fileInfoText.config(state='disabled')
+
     def buildTrie(self):
         if not self.currentFilePath:
             return
         
-        try:
-            self.trie = patternSearching.buildTrieFromFile(self.currentFilePath)
-            print(f"Trie built successfully for {self.currentFilePath}")
-        except Exception as e:
-            print(f"Error building Trie: {str(e)}")
+        filePath = self.currentFilePath
+
+        # Extraction, cleaning and Trie build all run on a worker thread
+        def work(cancelEvent, progress):
+            with instrumentation.recording(f"load {os.path.basename(filePath)}") as recorder:
+                trie = patternSearching.buildTrieFromFile(filePath, cancelEvent, progress)
+            return trie, recorder
+
+        def onDone(result):
+            self.trie, self.loadTimings = result
+            self.loadTask = None
+            self.showStatus("Ready.")
+            print(f"Trie built successfully for {filePath}")
+            messagebox.showinfo("Success.", f"Selected file:\n{os.path.basename(filePath)}")
+
+        def onError(e):
             self.trie = None
+            self.loadTask = None
+            self.showStatus("Could not load file.")
+            print(f"Error building Trie: {str(e)}")
+
+        self.showStatus("Loading file...", busy=True)
+        self.loadTask = self.taskRunner.submit(work, onDone, onError, self.showProgress)
+
+    def cancelTasks(self):
+        for task in (self.loadTask, self.searchTask):
+            if task:
+                task.cancel()
+        self.loadTask = self.searchTask = None
+        self.showStatus("Cancelled.")
+
+    def showStatus(self, message, busy=False):
+        self.statusLabel.config(text=message)
+        if busy:
+            self.progressBar.config(mode='indeterminate')
+            self.progressBar.start(10)
+            if not self.progressBar.winfo_ismapped():
+                self.cancelButton.pack(side='right')
+                self.progressBar.pack(side='right', padx=10)
+        else:
+            self.progressBar.stop()
+            self.progressBar.pack_forget()
+            self.cancelButton.pack_forget()
+
+    def showProgress(self, stage, done=None, total=None):
+        # Determinate bar when the stage knows its size, e.g. PDF pages
+        if total:
+            self.progressBar.stop()
+            self.progressBar.config(mode='determinate', maximum=total, value=done)
+            self.statusLabel.config(text=f"{stage} ({done}/{total})...")
+        else:
+            if str(self.progressBar.cget('mode')) != 'indeterminate':
+                self.progressBar.config(mode='indeterminate')
+                self.progressBar.start(10)
+            self.statusLabel.config(text=f"{stage}...")
     
     def createSearchTab(self):
         # Main frame
         mainFrame = ttk.Frame(self.searchFrame)
         mainFrame.pack(fill='both', expand=True, padx=20, pady=20)
 
-        if not self.currentFilePath:
+        if not self.currentFilePath and not self.corpusPaths:
             warningLabel = tk.Label(mainFrame,
                                     text="No file selected. Please select a file in the 'File' tab to start searching.",
                                     font=('Arial', 11),
@@ -222,8 +339,12 @@ class TextSearchingToolGUI:
             return
 
         # Current file display
+        if self.corpusPaths:
+            searchingIn = f"{len(self.corpusPaths)} files"
+        else:
+            searchingIn = os.path.basename(self.currentFilePath)
         fileLabel = ttk.Label(mainFrame, 
-                             text=f"Searching in: {os.path.basename(self.currentFilePath)}",
+                             text=f"Searching in: {searchingIn}",
                              font=('Arial', 10, 'bold'))
         fileLabel.pack(anchor='w', pady=(0, 10))
         
@@ -236,13 +357,40 @@ class TextSearchingToolGUI:
         self.algorithm_var = tk.StringVar(value="1")  # Default KMP
         algorithmOptions = [
             ("KMP", "1"),
-            ("Z-Function", "0")
+            ("Z-Function", "0"),
+            ("Suffix Array", "2")
         ]
         for text, value in algorithmOptions:
             ttk.Radiobutton(algorithmFrame, text=text, variable=self.algorithm_var, value=value).pack(side='left')
 
+        # Whole-word matching uses the word index instead of a full text scan
+        self.wholeWords_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(algorithmFrame, text="Match whole words",
+                        variable=self.wholeWords_var).pack(side='left', padx=(10, 0))
+
+        # What to report: early modes stop scanning or skip the position list
+        modeFrame = ttk.Frame(mainFrame)
+        modeFrame.pack(fill='x', pady=(0, 10))
+        ttk.Label(modeFrame, text="Report").pack(side='left', anchor='w')
+
+        self.mode_var = tk.StringVar(value="all")
+        ttk.Radiobutton(modeFrame, text="All matches", variable=self.mode_var, value="all").pack(side='left')
+        ttk.Radiobutton(modeFrame, text="First", variable=self.mode_var, value="first").pack(side='left')
+        self.limit_var = tk.IntVar(value=100)
+        ttk.Spinbox(modeFrame, from_=1, to=1000000, width=7,
+                    textvariable=self.limit_var).pack(side='left', padx=(0, 5))
+        ttk.Radiobutton(modeFrame, text="Count only", variable=self.mode_var, value="count").pack(side='left')
+        ttk.Radiobutton(modeFrame, text="Exists", variable=self.mode_var, value="exists").pack(side='left')
+
+        # Per-stage timings of the load and search, optionally profiled
+        ttk.Button(modeFrame, text="Export timings", command=self.exportTimings).pack(side='right')
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(modeFrame, text="Profile", variable=self.profile_var).pack(side='right')
+        self.showTimings_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(modeFrame, text="Timings", variable=self.showTimings_var).pack(side='right')
+
         # Text input
-        inputLabel = ttk.Label(mainFrame, text="Find in file:")
+        inputLabel = ttk.Label(mainFrame, text="Find in file (separate several terms with commas):")
         inputLabel.pack(anchor='w')
         
         # Entry with autocomplete container
@@ -280,6 +428,18 @@ class TextSearchingToolGUI:
         self.resultsText.pack(fill='both', expand=True)
         self.resultsText.insert('1.0', "Enter text and click 'Search' to find occurrences...")
         self.resultsText.config(state='disabled')
+
+        # Page navigation, only one page of matches is rendered at a time
+        pageFrame = ttk.Frame(resultsFrame)
+        pageFrame.pack(fill='x', pady=(5, 0))
+        self.previousPageButton = ttk.Button(pageFrame, text="< Previous", state='disabled',
+                                             command=lambda: self.showResultsPage(self.resultsPage - 1))
+        self.previousPageButton.pack(side='left')
+        self.nextPageButton = ttk.Button(pageFrame, text="Next >", state='disabled',
+                                         command=lambda: self.showResultsPage(self.resultsPage + 1))
+        self.nextPageButton.pack(side='right')
+        self.pageLabel = ttk.Label(pageFrame, text="", font=('Arial', 9))
+        self.pageLabel.pack()
     
     def refreshSearchTab(self):
         # Clear all widgets in search frame
@@ -290,7 +450,7 @@ class TextSearchingToolGUI:
         self.createSearchTab()
         
     def searchText(self):
-        if not self.currentFilePath:
+        if not self.currentFilePath and not self.corpusPaths:
             messagebox.showwarning("No file selected.", "Please select a file in the 'File' tab.")
             return
         
@@ -301,36 +461,248 @@ class TextSearchingToolGUI:
             return
         
         # Update results text
-        self.resultsText.config(state='normal')
-        self.resultsText.delete('1.0', tk.END)
-        self.resultsText.insert('1.0', f"Searching for '{query}'...\n\n")
-        
+        self.setResultRows(f"Searching for '{query}'...\n\n")
+
+        # Only the latest search is kept, an older one still running is dropped
+        if self.searchTask:
+            self.searchTask.cancel()
+
+        filePath = self.currentFilePath
+        algorithmSelected = int(self.algorithm_var.get())
+        wholeWords = self.wholeWords_var.get()
+        mode = self.mode_var.get()
+        profile = self.profile_var.get()
         try:
-            occurrences, executionTime, indexes = patternSearching.searchText(self.currentFilePath, query)
-
-            # Check if pattern is invalid
-            if occurrences == [] and executionTime == 0.0 and indexes == []:
-                self.resultsText.insert(tk.END, 
-                    "Invalid search query.\n\n"
-                    "The query only contains special characters or symbols\n"
-                    "that are removed during text cleaning.\n\n"
-                    "For proper text searching, please use queries containing letters or numbers.\n\n"
-                    "Examples: 'hello', 'world123', 'a'\n"
-                    "Invalid: '$', '@#!', '---'")
-            elif len(occurrences) != 0:
-                self.resultsText.insert(tk.END, f"{len(occurrences)} matches.\n")
-                self.resultsText.insert(tk.END, f"Execution time: {executionTime:.2f} ms\n")
-                self.resultsText.insert(tk.END, "At positions:\n")
-                for i, position in enumerate(occurrences):
-                    self.resultsText.insert(tk.END, f" - {position}\n")
+            limit = max(1, self.limit_var.get()) if mode == 'first' else None
+        except tk.TclError:
+            messagebox.showwarning("Invalid number", "Please enter how many matches to show.")
+            return
+        if mode == 'exists':
+            limit = 1
+
+        if self.corpusPaths:
+            self.searchCorpus(query, algorithmSelected, wholeWords, mode, limit, profile)
+            return
+
+        # A comma or newline separated list searches every term in one pass
+        terms = [term.strip() for term in re.split(r'[,\n]+', query) if term.strip()]
+        multipleTerms = len(terms) > 1
+
+        def search(cancelEvent, progress):
+            if multipleTerms:
+                return patternSearching.searchMultiple(filePath, terms, cancelEvent, progress)
+            if mode == 'count':
+                return patternSearching.countText(filePath, query, algorithmSelected,
+                                                  cancelEvent, progress, wholeWords=wholeWords)
+            # The searched document is handed to the results, so showing them
+            # never loads it again on the Tk thread
+            document = documentCache.loadDocument(filePath, cancelEvent, progress)
+            occurrences, executionTime, indexes = patternSearching.searchDocument(
+                document, query, algorithmSelected, cancelEvent, progress, wholeWords=wholeWords,
+                limit=limit)
+
+            # Builds the offset map and line index here, so describing a page
+            # later (on the Tk thread) is cheap
+            if occurrences:
+                progress("Locating matches")
+                document.getOffsetMap()
+                if not document.segmentLabels:
+                    document.getLineBreaks()
+            return occurrences, executionTime, indexes, document, len(textCleaning.cleanText(query))
+
+        def work(cancelEvent, progress):
+            with instrumentation.recording(f"search '{query}'", profile) as recorder:
+                result = search(cancelEvent, progress)
+            return result, recorder
+
+        def onDone(output):
+            result, self.searchTimings = output
+            self.searchTask = None
+            if not self.loadTask:
+                self.showStatus("Ready.")
+            if multipleTerms:
+                self.showMultipleResults(*result)
+            elif mode == 'count':
+                self.showCount(*result)
             else:
-                self.resultsText.insert(tk.END, "No matches.")
-                
-        except Exception as e:
-            self.resultsText.insert(tk.END, f"Error: {str(e)}")
-        
+                self.showSearchResults(*result, mode=mode)
+            self.showTimings()
+
+        def onError(e):
+            self.searchTask = None
+            if not self.loadTask:
+                self.showStatus("Ready.")
+            self.showResultsMessage(f"Error: {str(e)}")
+
+        self.showStatus("Searching...", busy=True)
+        self.searchTask = self.taskRunner.submit(work, onDone, onError, self.showProgress)
+
+    def searchCorpus(self, query, algorithmSelected, wholeWords, mode='all', limit=None,
+                     profile=False):
+        filePaths = self.corpusPaths
+
+        # Files are searched in a process pool, each result is shown as it arrives
+        # (stages run in the worker processes, only the total is recorded here)
+        def work(cancelEvent, progress, publish):
+            with instrumentation.recording(f"search '{query}' in {len(filePaths)} files",
+                                           profile) as recorder:
+                for result in corpusSearch.searchCorpus(filePaths, query, algorithmSelected,
+                                                        wholeWords, cancelEvent=cancelEvent,
+                                                        mode=mode, limit=limit):
+                    publish(result)
+                    progress("Searching files", result['filesSearched'], result['filesTotal'])
+                    instrumentation.count("files searched")
+            return len(filePaths), recorder
+
+        def onPartial(result):
+            fileName = os.path.basename(result['filePath'])
+            if result['error']:
+                self.showResultsMessage(f"{fileName}: error ({result['error']})\n")
+            elif result['count'] and mode == 'exists':
+                self.showResultsMessage(f"{fileName}\n")
+            elif result['count']:
+                self.showResultsMessage(f"{fileName}: {result['count']} matches "
+                                        f"({result['executionTime']:.2f} ms)\n")
+            self.totalMatches = result['totalMatches']
+
+        def onDone(output):
+            filesSearched, self.searchTimings = output
+            self.searchTask = None
+            self.showStatus("Ready.")
+            if mode == 'exists':
+                self.showResultsMessage(f"\nSearched {filesSearched} files.")
+            else:
+                self.showResultsMessage(f"\n{self.totalMatches} matches in {filesSearched} files.")
+            self.showTimings()
+
+        def onError(e):
+            self.searchTask = None
+            self.showStatus("Ready.")
+            self.showResultsMessage(f"Error: {str(e)}")
+
+        self.totalMatches = 0
+        self.showStatus("Searching files...", busy=True)
+        self.searchTask = self.taskRunner.submit(work, onDone, onError, self.showProgress, onPartial)
+
+    def setResultRows(self, header, rowCount=0, renderRows=None):
+        # Results are kept as a row source, never rendered all at once
+        self.resultsHeader = header
+        self.resultsFooter = ""
+        self.resultRowCount = rowCount
+        self.renderResultRows = renderRows
+        self.showResultsPage(0)
+
+    def showResultsPage(self, page):
+        # Rendering cost is O(PAGE_SIZE) whatever the number of matches
+        pageCount = max(1, -(-self.resultRowCount // PAGE_SIZE))
+        self.resultsPage = min(max(page, 0), pageCount - 1)
+        start = self.resultsPage * PAGE_SIZE
+        stop = min(start + PAGE_SIZE, self.resultRowCount)
+
+        rows = self.renderResultRows(start, stop) if self.renderResultRows else []
+        self.resultsText.config(state='normal')
+        self.resultsText.delete('1.0', tk.END)
+        self.resultsText.insert('1.0', self.resultsHeader + ''.join(row + '\n' for row in rows)
+                                + self.resultsFooter)
+        self.resultsText.config(state='disabled')
+
+        self.previousPageButton.config(state='normal' if self.resultsPage > 0 else 'disabled')
+        self.nextPageButton.config(state='normal' if stop < self.resultRowCount else 'disabled')
+        if self.resultRowCount > PAGE_SIZE:
+            self.pageLabel.config(text=f"Page {self.resultsPage + 1} of {pageCount} "
+                                       f"(matches {start + 1}-{stop} of {self.resultRowCount})")
+        else:
+            self.pageLabel.config(text="")
+
+    def showResultsMessage(self, message):
+        # Appended below the current page (corpus results, errors, timings)
+        self.resultsFooter += message
+        self.resultsText.config(state='normal')
+        self.resultsText.insert(tk.END, message)
         self.resultsText.config(state='disabled')
+
+    def showTimings(self):
+        if not (self.showTimings_var.get() or self.profile_var.get()):
+            return
+        recorders = [recorder for recorder in (self.loadTimings, self.searchTimings) if recorder]
+        if recorders:
+            self.showResultsMessage("\n\nTimings\n" + '\n\n'.join(recorder.summary()
+                                                                  for recorder in recorders))
+
+    def exportTimings(self):
+        if not (self.loadTimings or self.searchTimings):
+            messagebox.showinfo("No timings", "Load a file and run a search first.")
+            return
+        filePath = filedialog.asksaveasfilename(title="Export timings",
+                                                defaultextension='.json',
+                                                filetypes=[("JSON", "*.json")])
+        if not filePath:
+            return
+        timings = {'load': self.loadTimings.toDict() if self.loadTimings else None,
+                   'search': self.searchTimings.toDict() if self.searchTimings else None}
+        try:
+            with open(filePath, 'w', encoding='utf-8') as file:
+                json.dump(timings, file, indent=1)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export timings:\n{str(e)}")
+
+    def showCount(self, count, executionTime):
+        self.setResultRows(f"{count} matches.\nExecution time: {executionTime:.2f} ms\n")
+
+    def showSearchResults(self, occurrences, executionTime, indexes, document=None, matchLength=0,
+                          mode='all'):
+        # Check if pattern is invalid
+        if occurrences == [] and executionTime == 0.0 and indexes == []:
+            self.setResultRows(
+                "Invalid search query.\n\n"
+                "The query only contains special characters or symbols\n"
+                "that are removed during text cleaning.\n\n"
+                "For proper text searching, please use queries containing letters or numbers.\n\n"
+                "Examples: 'hello', 'world123', 'a'\n"
+                "Invalid: '$', '@#!', '---'")
+        elif len(occurrences) != 0 and mode == 'exists':
+            self.setResultRows(f"Found (first match at position {occurrences[0]}).\n"
+                               f"Execution time: {executionTime:.2f} ms\n")
+        elif len(occurrences) != 0:
+            # Original location and snippet, only for the rows of the shown page
+            def renderRows(start, stop):
+                details = patternSearching.iterMatchDetails(document, occurrences[start:stop], matchLength)
+                return [f" - {detail['position']} ({detail['locator']}, "
+                        f"offset {detail['originalOffset']}): {detail['snippet']}" for detail in details]
+
+            matchesFound = f"First {len(occurrences)} matches" if mode == 'first' else f"{len(occurrences)} matches"
+            self.setResultRows(f"{matchesFound}.\n"
+                               f"Execution time: {executionTime:.2f} ms\n"
+                               "At positions:\n", len(occurrences), renderRows)
+        else:
+            self.setResultRows("No matches.")
     
+    def showMultipleResults(self, results, executionTime):
+        if not results:
+            self.setResultRows("Invalid search query.\n\n"
+                               "None of the terms contain letters or numbers.")
+            return
+
+        totalMatches = sum(len(occurrences) for occurrences in results.values())
+        summary = ''.join(f"'{term}': {len(occurrences)} matches.\n"
+                          for term, occurrences in results.items())
+
+        # Rows of every term one after the other, a row index finds its term by bisection
+        terms = list(results)
+        termStarts = [0] + list(accumulate(len(results[term]) for term in terms))
+
+        def renderRows(start, stop):
+            rows = []
+            for row in range(start, stop):
+                termIndex = bisect_right(termStarts, row) - 1
+                term = terms[termIndex]
+                rows.append(f" - '{term}' at {results[term][row - termStarts[termIndex]]}")
+            return rows
+
+        self.setResultRows(f"{totalMatches} matches for {len(results)} terms.\n"
+                           f"Execution time: {executionTime:.2f} ms\n"
+                           f"{summary}\nAt positions:\n", totalMatches, renderRows)
+
     def onKeyRelease(self, event):
         # Ignore special keys
         if event.keysym in ('Up', 'Down', 'Left', 'Right', 'Return', 
@@ -353,11 +725,9 @@ class TextSearchingToolGUI:
         
         # Try fuzzy matching (if no exact match exists)
         if not suggestions and len(text) >= 3:
+            # Already sorted by edit distance (lower distance = better match)
             fuzzy_results = self.trie.getSuggestions(text, limit=6, fuzzy=True, maxErrors=1)
-            # Sort by edit distance (lower distance = better match)
-            if fuzzy_results:
-                fuzzy_results.sort(key=lambda x: x[1])  # x[1] is the distance
-                suggestions = [word for word, dist in fuzzy_results]  # Extract just the word
+            suggestions = [word for word, dist in fuzzy_results]  # Extract just the word
         
         if suggestions:
             self.showSuggestions(suggestions)
@@ -398,14 +768,16 @@ class TextSearchingToolGUI:
 
 # Main -----------------------------------------------------------------
 
-window = TkinterDnD.Tk()
+# Guarded so worker processes (corpus search) can import this module
+if __name__ == '__main__':
+    window = TkinterDnD.Tk()
 
-app = TextSearchingToolGUI(window)
+    app = TextSearchingToolGUI(window)
 
-# Center window
-window.update_idletasks()
-x = (window.winfo_screenwidth() // 2) - (window.winfo_width() // 2)
-y = (window.winfo_screenheight() // 2) - (window.winfo_height() // 2)
-window.geometry(f"+{x}+{y}")
+    # Center window
+    window.update_idletasks()
+    x = (window.winfo_screenwidth() // 2) - (window.winfo_width() // 2)
+    y = (window.winfo_screenheight() // 2) - (window.winfo_height() // 2)
+    window.geometry(f"+{x}+{y}")
 
-window.mainloop()
+    window.mainloop()
@@ -1,21 +1,42 @@
 """
 Steps for text searching:
-- Extract text
+- Extract text (reused from the document cache when available)
 - Pass extracted text for cleaning
 - Pass cleaned text to Pattern Matching function
-- Search for text and show:
+- Search for text (linear algorithm, or word index for whole words) and show:
     - Occurences
     - Exact word positions
 
+Search modes: 'all' positions, the 'first' N positions, 'count' only or
+'exists', the last three stop early or never build a list of positions
+
+kmpIter / zIter yield positions lazily with O(m) working memory, the
+list-returning kmp / findOccurrences are thin wrappers around them
+
 """
 
 # Imports ------------------------------------------------------------
 
 import textExtraction
 import textCleaning
+import documentCache
+import diskCache
+import instrumentation
+import wordIndex
 import autocompletion
+from backgroundTasks import checkCancelled, reportProgress
+from array import array
+from collections import deque
+from heapq import nsmallest
+from itertools import islice
+import mmap
+import os
+import re
 import time
 
+SEARCH_MODES = ('all', 'first', 'count', 'exists')
+ALGORITHM_NAMES = {0: 'Z', 1: 'KMP', 2: 'suffix array'}
+
 # Functions ------------------------------------------------------------
 
 def zFunction(S):
@@ -23,7 +44,7 @@ def zFunction(S):
     right, left = 0, 0
     z = [0] * n
     
-    for i in range(1, n - 1):
+    for i in range(1, n):
         if i < right:
             z[i] = min(right - i, z[i - left])
         while i + z[i] < n and S[z[i]] == S[i + z[i]]:
@@ -33,15 +54,27 @@ def zFunction(S):
             right = i + z[i]
     return z
 
-def findOccurrences(pattern, text):
-    m = len(pattern)
-    concatenated = pattern + "$" + text
-    z = zFunction(concatenated)
-    occurrences = []
-    for i in range(m + 1, len(concatenated)):
-        if z[i] == m:
-            occurrences.append(i - m - 1)
-    return occurrences
+def zIter(pattern, text):
+    # Z-function of pattern + text without building pattern + "$" + text:
+    # only the pattern's z-array is stored (O(m) memory), the z-box over
+    # the text is tracked with two integers. Positions are yielded as found
+    zPattern = zFunction(pattern)
+    m, n = len(pattern), len(text)
+    left = right = 0  # text[left:right] == pattern[:right - left]
+    for i in range(n - m + 1):
+        length = min(zPattern[i - left], right - i) if i < right else 0
+        while length < m and text[i + length] == pattern[length]:
+            length += 1
+        if i + length > right:
+            left, right = i, i + length
+        if length == m:
+            yield i
+
+def findOccurrences(pattern, text, limit=None):
+    return list(islice(zIter(pattern, text), limit))
+
+def zCount(pattern, text):
+    return sum(1 for _ in zIter(pattern, text))
 
 def calculateLPS(pattern):
     prefixes = [0] * len(pattern)
@@ -60,11 +93,11 @@ def calculateLPS(pattern):
                 j = prefixes[j - 1]
     return prefixes
 
-def kmp(pattern, text):
+def kmpIter(pattern, text):
+    # Yields positions as they are found, working memory is the LPS table
     lps = calculateLPS(pattern)
     m, n = len(pattern), len(text)
     i = j = 0
-    occurrences = []
     
     while i < n:
         if text[i] == pattern[j]:
@@ -72,7 +105,7 @@ def kmp(pattern, text):
             j += 1
         if j == m:
             # Match found
-            occurrences.append(i - j)
+            yield i - j
             # Continue searching for more occurrences
             j = lps[j - 1]
         elif i < n and text[i] != pattern[j]:
@@ -80,11 +113,241 @@ def kmp(pattern, text):
                 i += 1
             else:
                 j = lps[j - 1]
+
+def kmp(pattern, text, limit=None):
+    return list(islice(kmpIter(pattern, text), limit))
+
+def kmpCount(pattern, text):
+    return sum(1 for _ in kmpIter(pattern, text))
+
+def kmpStream(pattern, chunks):
+    # KMP over a stream of text chunks, the automaton state (j) is carried
+    # across chunk boundaries so matches spanning two chunks are found
+    lps = calculateLPS(pattern)
+    m = len(pattern)
+    j = 0
+    offset = 0  # Position of the current chunk in the whole text
+    for chunk in chunks:
+        for i, char in enumerate(chunk):
+            while j > 0 and char != pattern[j]:
+                j = lps[j - 1]
+            if char == pattern[j]:
+                j += 1
+            if j == m:
+                yield offset + i - m + 1
+                j = lps[j - 1]
+        offset += len(chunk)
+
+# Longest cleaned text the suffix array is built for: construction runs in
+# pure Python (several seconds per MB), longer texts use KMP or Z instead
+MAX_SUFFIX_ARRAY_LENGTH = 8 * 1024 * 1024
+CANCEL_CHECK_BLOCK = 1 << 16  # Positions processed between cancellation checks
+
+def blocks(start, stop, step, cancelEvent):
+    # range(start, stop, step) split in blocks, cancellation checked between them
+    blockStep = CANCEL_CHECK_BLOCK * step
+    for blockStart in range(start, stop, blockStep):
+        checkCancelled(cancelEvent)
+        yield range(blockStart, min(blockStart + blockStep, stop) if step > 0
+                    else max(blockStart + blockStep, stop), step)
+
+def saIs(s, upper, cancelEvent=None):
+    # SA-IS suffix array construction, O(n) over integers in [0, upper].
+    # Work buffers are arrays/bytearrays (4 or 1 bytes per position)
+    n = len(s)
+    if n == 0:
+        return array('i')
+    if n == 1:
+        return array('i', [0])
+    if n == 2:
+        return array('i', [0, 1] if s[0] < s[1] else [1, 0])
+
+    # Classify suffixes: 1 = S-type (smaller than next), 0 = L-type
+    ls = bytearray(n)
+    for block in blocks(n - 2, -1, -1, cancelEvent):
+        for i in block:
+            ls[i] = ls[i + 1] if s[i] == s[i + 1] else s[i] < s[i + 1]
+
+    # Bucket boundaries for L-type and S-type suffixes of each character
+    sumL = [0] * (upper + 1)
+    sumS = [0] * (upper + 1)
+    for i in range(n):
+        if not ls[i]:
+            sumS[s[i]] += 1
+        else:
+            sumL[s[i] + 1] += 1
+    for i in range(upper + 1):
+        sumS[i] += sumL[i]
+        if i < upper:
+            sumL[i + 1] += sumS[i]
+
+    sa = array('i', [-1]) * n
+
+    def induce(lms):
+        checkCancelled(cancelEvent)
+        sa[:] = array('i', [-1]) * n
+        buckets = sumS[:]
+        for d in lms:
+            if d != n:
+                sa[buckets[s[d]]] = d
+                buckets[s[d]] += 1
+        buckets = sumL[:]
+        sa[buckets[s[n - 1]]] = n - 1
+        buckets[s[n - 1]] += 1
+        for block in blocks(0, n, 1, cancelEvent):
+            for i in block:
+                v = sa[i]
+                if v >= 1 and not ls[v - 1]:
+                    sa[buckets[s[v - 1]]] = v - 1
+                    buckets[s[v - 1]] += 1
+        buckets = sumL[:]
+        for block in blocks(n - 1, -1, -1, cancelEvent):
+            for i in block:
+                v = sa[i]
+                if v >= 1 and ls[v - 1]:
+                    buckets[s[v - 1] + 1] -= 1
+                    sa[buckets[s[v - 1] + 1]] = v - 1
+
+    # Leftmost S-type positions (LMS) are sorted first
+    lmsMap = array('i', [-1]) * (n + 1)
+    lms = array('i')
+    for i in range(1, n):
+        if not ls[i - 1] and ls[i]:
+            lmsMap[i] = len(lms)
+            lms.append(i)
+    m = len(lms)
+    induce(lms)
+
+    if m:
+        # Name LMS substrings and sort them recursively when names repeat
+        checkCancelled(cancelEvent)
+        sortedLms = array('i', (v for v in sa if lmsMap[v] != -1))
+        reducedString = array('i', [0]) * m
+        reducedUpper = 0
+        for i in range(1, m):
+            left, right = sortedLms[i - 1], sortedLms[i]
+            endLeft = lms[lmsMap[left] + 1] if lmsMap[left] + 1 < m else n
+            endRight = lms[lmsMap[right] + 1] if lmsMap[right] + 1 < m else n
+            same = True
+            if endLeft - left != endRight - right:
+                same = False
+            else:
+                while left < endLeft and s[left] == s[right]:
+                    left += 1
+                    right += 1
+                if left == n or s[left] != s[right]:
+                    same = False
+            if not same:
+                reducedUpper += 1
+            reducedString[lmsMap[sortedLms[i]]] = reducedUpper
+        del sortedLms
+
+        reducedSa = saIs(reducedString, reducedUpper, cancelEvent)
+        del reducedString
+        induce(array('i', (lms[i] for i in reducedSa)))
+    return sa
+
+def buildSuffixArray(text, cancelEvent=None):
+    if len(text) > MAX_SUFFIX_ARRAY_LENGTH:
+        raise ValueError(f"text too long for the suffix array ({len(text)} characters, "
+                         f"{MAX_SUFFIX_ARRAY_LENGTH} max), use KMP or Z")
+    # Map characters to dense ranks so buckets stay small, one byte per
+    # character when there are at most 256 distinct ones
+    alphabet = sorted(set(text))
+    if len(alphabet) <= 256:
+        ranks = text.translate({ord(char): rank for rank, char in enumerate(alphabet)}).encode('latin-1')
+    else:
+        ranks = array('i', map({char: rank for rank, char in enumerate(alphabet)}.__getitem__, text))
+    return saIs(ranks, max(len(alphabet) - 1, 0), cancelEvent)
+
+def suffixArrayRange(pattern, text, suffixArray):
+    # Binary search the block of suffixes starting with the pattern, O(m log n)
+    m, n = len(pattern), len(suffixArray)
+
+    low, high = 0, n
+    while low < high:
+        middle = (low + high) // 2
+        start = suffixArray[middle]
+        if text[start:start + m] < pattern:
+            low = middle + 1
+        else:
+            high = middle
+    first = low
+
+    high = n
+    while low < high:
+        middle = (low + high) // 2
+        start = suffixArray[middle]
+        if text[start:start + m] == pattern:
+            low = middle + 1
+        else:
+            high = middle
+    return first, low
+
+def suffixArraySearch(pattern, text, suffixArray, limit=None):
+    first, last = suffixArrayRange(pattern, text, suffixArray)
+    if limit is not None:
+        # Only the smallest positions are needed, no full sort
+        return nsmallest(limit, suffixArray[first:last])
+    return sorted(suffixArray[first:last])
+
+def buildAhoCorasick(patterns):
+    # Trie of all patterns plus failure links (longest proper suffix in trie)
+    goto = [{}]
+    fail = [0]
+    output = [[]]  # node -> indexes of patterns ending here
+    for patternIndex, pattern in enumerate(patterns):
+        node = 0
+        for char in pattern:
+            if char not in goto[node]:
+                goto.append({})
+                fail.append(0)
+                output.append([])
+                goto[node][char] = len(goto) - 1
+            node = goto[node][char]
+        output[node].append(patternIndex)
+
+    # Breadth-first so failure targets are always resolved before use
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for char, child in goto[node].items():
+            queue.append(child)
+            state = fail[node]
+            while state and char not in goto[state]:
+                state = fail[state]
+            fail[child] = goto[state].get(char, 0)
+            output[child] = output[child] + output[fail[child]]
+    return goto, fail, output
+
+def ahoCorasick(patterns, text):
+    # Every pattern is found in a single pass over the text
+    goto, fail, output = buildAhoCorasick(patterns)
+    occurrences = [[] for _ in patterns]
+    node = 0
+    for i, char in enumerate(text):
+        while node and char not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(char, 0)
+        for patternIndex in output[node]:
+            occurrences[patternIndex].append(i - len(patterns[patternIndex]) + 1)
     return occurrences
 
-def searchText(filePath, pattern, algoritmSelected=1):
-    extractedText = textExtraction.chooseExtractionMethod(filePath)
-    cleanedText = textCleaning.cleanText(extractedText)
+def searchText(filePath, pattern, algoritmSelected=1, cancelEvent=None, progress=None,
+               wholeWords=False, limit=None):
+    document = documentCache.loadDocument(filePath, cancelEvent, progress)
+    return searchDocument(document, pattern, algoritmSelected, cancelEvent, progress, wholeWords,
+                          limit)
+
+def countText(filePath, pattern, algoritmSelected=1, cancelEvent=None, progress=None,
+              wholeWords=False):
+    document = documentCache.loadDocument(filePath, cancelEvent, progress)
+    return countDocument(document, pattern, algoritmSelected, cancelEvent, progress, wholeWords)
+
+def searchDocument(document, pattern, algoritmSelected=1, cancelEvent=None, progress=None,
+                   wholeWords=False, limit=None):
+    # limit stops at the first `limit` positions ('first' and 'exists' modes)
+    cleanedText = document.cleanedText
     cleanedPattern = textCleaning.cleanText(pattern).strip()
     
     # Validate cleaned pattern is not empty
@@ -93,13 +356,31 @@ def searchText(filePath, pattern, algoritmSelected=1):
     
     indexes = []
         
-    startTime = time.perf_counter()
-    if algoritmSelected == 0:
-        occurrences = findOccurrences(cleanedPattern, cleanedText)
-    else:
-        occurrences = kmp(cleanedPattern, cleanedText)
-    endTime = time.perf_counter()
+    checkCancelled(cancelEvent)
+    if wholeWords:
+        # Whole-word queries are answered from the inverted index (built once)
+        reportProgress(progress, "Indexing words")
+        index = document.getIndex('words', wordIndex.WordIndex)
+    elif algoritmSelected == 2:
+        # Suffix array is built once per document, then reused by every query
+        reportProgress(progress, "Building suffix array")
+        suffixArray = document.getIndex('suffixArray', lambda text: buildSuffixArray(text, cancelEvent))
+
+    reportProgress(progress, "Searching")
+    algorithmName = 'whole words' if wholeWords else ALGORITHM_NAMES.get(algoritmSelected, 'KMP')
+    with instrumentation.span(f"search ({algorithmName})", len(cleanedText)):
+        startTime = time.perf_counter()
+        if wholeWords:
+            occurrences = index.search(cleanedPattern)[:limit]
+        elif algoritmSelected == 2:
+            occurrences = suffixArraySearch(cleanedPattern, cleanedText, suffixArray, limit)
+        elif algoritmSelected == 0:
+            occurrences = findOccurrences(cleanedPattern, cleanedText, limit)
+        else:
+            occurrences = kmp(cleanedPattern, cleanedText, limit)
+        endTime = time.perf_counter()
     executionTime = (endTime - startTime) * 1000  # Milliseconds
+    instrumentation.count("matches", len(occurrences))
 
     if len(occurrences) != 0:
         for i, position in enumerate(occurrences):
@@ -107,15 +388,170 @@ def searchText(filePath, pattern, algoritmSelected=1):
 
     return occurrences, executionTime, indexes    
 
-def buildTrieFromFile(filePath):
-    extractedText = textExtraction.chooseExtractionMethod(filePath)
-    cleanedText = textCleaning.cleanText(extractedText)
-    words = textCleaning.separateWords(cleanedText)
-    uniqueWords = textCleaning.identifyUniqueWords(words)
+def countDocument(document, pattern, algoritmSelected=1, cancelEvent=None, progress=None,
+                  wholeWords=False):
+    # Number of matches without building the list of positions
+    cleanedText = document.cleanedText
+    cleanedPattern = textCleaning.cleanText(pattern).strip()
+    if not cleanedPattern:
+        return 0, 0.0
+
+    checkCancelled(cancelEvent)
+    if wholeWords:
+        reportProgress(progress, "Indexing words")
+        index = document.getIndex('words', wordIndex.WordIndex)
+    elif algoritmSelected == 2:
+        reportProgress(progress, "Building suffix array")
+        suffixArray = document.getIndex('suffixArray', lambda text: buildSuffixArray(text, cancelEvent))
+
+    reportProgress(progress, "Counting")
+    algorithmName = 'whole words' if wholeWords else ALGORITHM_NAMES.get(algoritmSelected, 'KMP')
+    with instrumentation.span(f"count ({algorithmName})", len(cleanedText)):
+        startTime = time.perf_counter()
+        if wholeWords:
+            count = len(index.search(cleanedPattern))
+        elif algoritmSelected == 2:
+            # Size of the block of matching suffixes, O(m log n)
+            first, last = suffixArrayRange(cleanedPattern, cleanedText, suffixArray)
+            count = last - first
+        elif algoritmSelected == 0:
+            count = zCount(cleanedPattern, cleanedText)
+        else:
+            count = kmpCount(cleanedPattern, cleanedText)
+        endTime = time.perf_counter()
+    executionTime = (endTime - startTime) * 1000  # Milliseconds
+    instrumentation.count("matches", count)
+
+    return count, executionTime
+
+def describeMatch(document, position, length, width=40):
+    # Original offset, locator and KWIC snippet of a match in the cleaned text
+    offsetMap = document.getOffsetMap()
+    start = offsetMap.toOriginal(position)
+    end = offsetMap.toOriginal(position + length - 1) + 1
+    text = document.extractedText
+
+    before, match, after = (re.sub(r'\s+', ' ', part) for part in
+                            (text[max(start - width, 0):start], text[start:end], text[end:end + width]))
+    snippet = f"...{before}[{match}]{after}..."
+    return {'position': position, 'originalOffset': start,
+            'locator': document.locate(start), 'snippet': snippet}
+
+def iterMatchDetails(document, occurrences, length, width=40):
+    # Lazy, so only the matches actually shown are described
+    for position in occurrences:
+        yield describeMatch(document, position, length, width)
+
+def searchMultiple(filePath, patterns, cancelEvent=None, progress=None):
+    cleanedText = documentCache.loadDocument(filePath, cancelEvent, progress).cleanedText
+
+    # Clean every term, dropping empty and repeated ones (first seen order)
+    cleanedPatterns = []
+    for pattern in patterns:
+        cleanedPattern = textCleaning.cleanText(pattern).strip()
+        if cleanedPattern and cleanedPattern not in cleanedPatterns:
+            cleanedPatterns.append(cleanedPattern)
+
+    if not cleanedPatterns:
+        return {}, 0.0
+
+    checkCancelled(cancelEvent)
+    reportProgress(progress, "Searching")
+    with instrumentation.span("search (Aho-Corasick)", len(cleanedText)):
+        startTime = time.perf_counter()
+        occurrences = ahoCorasick(cleanedPatterns, cleanedText)
+        endTime = time.perf_counter()
+    instrumentation.count("matches", sum(len(positions) for positions in occurrences))
+    executionTime = (endTime - startTime) * 1000  # Milliseconds
+
+    return dict(zip(cleanedPatterns, occurrences)), executionTime
+
+# Byte classes of pure ASCII text: b'a' = kept by cleaning, b' ' = separator
+ASCII_CLASSES = bytes(ord('a') if chr(byte).isascii() and chr(byte).isalnum() else ord(' ')
+                      for byte in range(256))
+NON_ASCII_BYTE = re.compile(rb'[\x80-\xff]')
+
+def searchMapped(filePath, cleanedPattern, windowSize=16 * 1024 * 1024):
+    # Zero-copy search of a pure ASCII file: the regex runs on the mmap'd
+    # bytes, cleaning is applied to the pattern instead of the text
+    # (any run of non-alphanumeric bytes matches one cleaned space)
+    words = [re.escape(word.encode('ascii')) for word in cleanedPattern.split(' ')]
+    regex = re.compile(rb'(?=' + rb'[^a-zA-Z0-9]+'.join(words) + rb')', re.IGNORECASE)
+
+    with open(filePath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # Map byte offsets back to cleaned-text offsets: kept bytes count
+            # one each, every separator run after a kept byte counts one
+            cleanedOffset = 0
+            scanned = 0
+            previousClass = b' '
+            for match in regex.finditer(mapped):
+                position = match.start()
+                while scanned < position:
+                    end = min(position, scanned + windowSize)
+                    classes = mapped[scanned:end].translate(ASCII_CLASSES)
+                    cleanedOffset += classes.count(b'a') + classes.count(b'a ')
+                    if previousClass == b'a' and classes[:1] == b' ':
+                        cleanedOffset += 1
+                    previousClass = classes[-1:]
+                    scanned = end
+                yield cleanedOffset
+
+def isAsciiFile(filePath):
+    with open(filePath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return True
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return NON_ASCII_BYTE.search(mapped) is None
+
+def searchStream(filePath, pattern, chunkSize=1024 * 1024):
+    # Yields match positions (in the cleaned text) as they are found, peak
+    # memory is bounded by the chunk size instead of the file size
+    cleanedPattern = textCleaning.cleanText(pattern).strip()
+    if not cleanedPattern:
+        return
+
+    if not filePath.endswith(textExtraction.PLAIN_TEXT_EXTENSIONS):
+        # Other formats need their whole document extracted anyway
+        yield from searchText(filePath, cleanedPattern)[0]
+        return
+
+    if isAsciiFile(filePath):
+        # Fast path: no decoding or cleaning copies of the text at all
+        yield from searchMapped(filePath, cleanedPattern)
+        return
+
+    chunks = textExtraction.iterPlainTextChunks(filePath, chunkSize)
+    yield from kmpStream(cleanedPattern, textCleaning.cleanChunks(chunks))
+
+def trieSourceVersion():
+    # Cached tries are rebuilt when the extraction or cleaning rules change
+    return textExtraction.EXTRACTION_VERSION << 16 | textCleaning.CLEANING_VERSION
+
+def buildTrieFromFile(filePath, cancelEvent=None, progress=None):
+    # A known document (same contents) reloads its trie from the disk cache
+    with instrumentation.span("autocomplete cache lookup"):
+        fileHash = diskCache.hashFile(filePath)
+        trie = autocompletion.CompactTrie.fromBuffer(
+            diskCache.mapBinary(fileHash, diskCache.TRIE_SUFFIX), trieSourceVersion())
+    if trie is not None:
+        instrumentation.count("autocomplete cache hits")
+        return trie
+
+    cleanedText = documentCache.loadDocument(filePath, cancelEvent, progress).cleanedText
+    with instrumentation.span("vocabulary", len(cleanedText)):
+        words = textCleaning.separateWords(cleanedText)
+        vocabulary = textCleaning.buildVocabulary(words)
+    instrumentation.count("distinct words", len(vocabulary))
     
-    trie = autocompletion.Trie()
-    for word in uniqueWords:
-        trie.insert(word)
+    checkCancelled(cancelEvent)
+    reportProgress(progress, "Building autocomplete")
+    with instrumentation.span("autocomplete trie"):
+        # Packed arrays: ~16x less memory than a node per character
+        trie = autocompletion.CompactTrie.fromWords(vocabulary)
+    diskCache.storeBinary(fileHash, diskCache.TRIE_SUFFIX, trie.toBytes(trieSourceVersion()))
     
     return trie
 
@@ -4,13 +4,24 @@ cleaning properties:
 - remove punctuation and special characters
 - remove extra whitespaces
 
+Cleaning is table driven: each character maps to its cleaned replacement
+through str.translate (cached per character), with a byte-level fast path
+for pure ASCII text
+
+cleanChunks applies the same cleaning to a stream of chunks, so large
+files can be cleaned without holding the whole text in memory
+
 """
 
 # Imports ------------------------------------------------------------
 
 import textExtraction
 import re
+import sys
 import unicodedata
+from array import array
+from bisect import bisect_right
+from collections import Counter
 
 """
 regex module for text cleaning
@@ -18,18 +29,49 @@ regex module for text cleaning
  patterns
 """
 
+# Bump when cleaning rules change so cached cleaned text is rebuilt
+CLEANING_VERSION = 1
+
 # Functions ------------------------------------------------------------
 
 def cleanText(text):
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove accents
+    # Remove extra whitespaces (only spaces are left after normalization)
+    return ' '.join(normalizeCharacters(text).split())
+
+# Every ASCII byte -> lowercase letter/digit or space
+ASCII_TABLE = bytes(ord(chr(byte).lower()) if chr(byte).isascii() and chr(byte).isalnum()
+                    else ord(' ') for byte in range(256))
+
+class AccentStrippingMap(dict):
+    # Character -> cleaned replacement, computed on first lookup and cached
     """
     NFD = Normalization Form Decomposition
     Separates 'é' into 'e' + accent mark
     Mn = Mark, nonspacing
     """
+    def __missing__(self, codePoint):
+        decomposed = unicodedata.normalize('NFD', chr(codePoint))
+        replacement = ''.join(char if 'a' <= char <= 'z' or '0' <= char <= '9' else ' '
+                              for char in decomposed
+                              if unicodedata.category(char) != 'Mn')
+        self[codePoint] = replacement
+        return replacement
+
+accentStrippingMap = AccentStrippingMap()
+
+def normalizeCharacters(text):
+    # Lowercase, remove accents, punctuation and special characters -> spaces
+    if text.isascii():
+        # Fast path: a single byte-level table lookup
+        return text.encode('ascii').translate(ASCII_TABLE).decode('ascii')
+    return text.lower().translate(accentStrippingMap)
+
+# Original multi-pass implementation, kept as the reference for benchmarks
+def referenceCleanText(text):
+    # Convert to lowercase
+    text = text.lower()
+    
+    # Remove accents
     text = unicodedata.normalize('NFD', text)
     text = ''.join(char for char in text 
                    if unicodedata.category(char) != 'Mn')
@@ -42,17 +84,112 @@ def cleanText(text):
 
     return text
 
+# Streaming cleaning (same output as cleanText over the joined chunks)
+def cleanChunks(chunks):
+    started = False  # Some text was already yielded
+    pendingSpace = False  # Whitespace seen since the last yielded text
+    for chunk in chunks:
+        normalized = re.sub(r'\s+', ' ', normalizeCharacters(chunk))
+        core = normalized.strip()
+        if not core:
+            pendingSpace = pendingSpace or bool(normalized)
+            continue
+
+        # Whitespace runs crossing chunk boundaries collapse to one space
+        if started and (pendingSpace or normalized[0] == ' '):
+            core = ' ' + core
+        started = True
+        pendingSpace = normalized[-1] == ' '
+        yield core
+
+# Offset maps (cleaned text positions -> original text positions)
+class RunLengthOffsets:
+    # Runs where original = position + delta, a new run only starts when
+    # the delta changes, so the map stays small for mostly regular text
+    def __init__(self):
+        self.starts = array('q')
+        self.deltas = array('q')
+
+    def add(self, start, delta):
+        if self.deltas and self.deltas[-1] == delta:
+            return
+        if self.starts and self.starts[-1] == start:
+            self.deltas[-1] = delta
+            return
+        self.starts.append(start)
+        self.deltas.append(delta)
+
+    def map(self, position):
+        run = bisect_right(self.starts, position) - 1
+        return position + (self.deltas[run] if run >= 0 else 0)
+
+class OffsetMap:
+    def __init__(self, characterOffsets, spaceOffsets):
+        self.characterOffsets = characterOffsets  # normalized -> original
+        self.spaceOffsets = spaceOffsets  # cleaned -> normalized
+
+    def toOriginal(self, cleanedPosition):
+        return self.characterOffsets.map(self.spaceOffsets.map(cleanedPosition))
+
+    def sizeInBytes(self):
+        return sum(sys.getsizeof(runs) for offsets in (self.characterOffsets, self.spaceOffsets)
+                   for runs in (offsets.starts, offsets.deltas))
+
+class OriginalCharacterMap(dict):
+    # Original character -> cleaned replacement (lowercasing included)
+    def __missing__(self, codePoint):
+        replacement = ''.join(accentStrippingMap[ord(char)] for char in chr(codePoint).lower())
+        self[codePoint] = replacement
+        return replacement
+
+originalCharacterMap = OriginalCharacterMap()
+
+def cleanTextWithOffsets(text):
+    # Same output as cleanText plus an OffsetMap back to the original text
+    characterOffsets = RunLengthOffsets()
+    if text.isascii():
+        normalized = normalizeCharacters(text)  # One character per character
+    else:
+        # Characters may expand (e.g. 'ǆ' -> 'dz') or vanish (accent marks)
+        normalized = text.translate(originalCharacterMap)
+        delta = 0
+        for match in re.finditer(r'[^\x00-\x7f]', text):
+            original = match.start()
+            length = len(originalCharacterMap[ord(match.group())])
+            if length == 1:
+                continue
+            position = original - delta
+            for extra in range(length):
+                characterOffsets.add(position + extra, original - position - extra)
+            delta = original + 1 - (position + length)
+            characterOffsets.add(position + length, delta)
+
+    # Collapsing whitespace shifts everything after a run of 2+ spaces
+    spaceOffsets = RunLengthOffsets()
+    removed = 0
+    for match in re.finditer(r'^ +| {2,}', normalized):
+        if match.start() == 0:
+            removed += match.end()
+        else:
+            removed += match.end() - match.start() - 1
+        spaceOffsets.add(match.end() - removed, removed)
+
+    cleanedText = ' '.join(normalized.split())
+    return cleanedText, OffsetMap(characterOffsets, spaceOffsets)
+
 # Individual word separation
 def separateWords(text):
     return text.split()
 
-# Unique word identification
+# Unique word identification (first-seen order, hashed membership)
 def identifyUniqueWords(text):
-    uniqueWords = []
-    for word in text:
-        if word not in uniqueWords:
-            uniqueWords.append(word)
-    return uniqueWords
+    return list(dict.fromkeys(text))
+
+# Vocabulary: word -> number of occurrences, in first-seen order
+def buildVocabulary(words):
+    # Counter counts in C and keeps insertion order, so its keys are the
+    # unique words in the order identifyUniqueWords returns them
+    return Counter(words)
 
 # Testing --------------------------------------------------------------
 
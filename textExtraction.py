@@ -10,37 +10,103 @@ file types: .docx, .xlsx, .pptx
 
 pdf files
 file type: .pdf
+
+Format libraries (python-docx, pdfplumber, OCR...) are only imported the
+first time a file of their format is extracted
+
+Extraction and OCR are recorded as instrumentation spans
+
+PDF pages are extracted in batches across a process pool (kept in page
+order), scanned pages are detected and OCR'd one page at a time
+
+Spreadsheets are streamed row by row (openpyxl read-only mode), comments
+are read separately from the package XML
 """
 
 # Imports ------------------------------------------------------------
 
-from docx import Document
-from pptx import Presentation
-import openpyxl
-import pdfplumber
-import pytesseract
-from pdf2image import convert_from_path
+import diskCache
+import instrumentation
+import importlib
+import os
+import posixpath
+import zipfile
+from itertools import accumulate
+from backgroundTasks import checkCancelled, reportProgress
+from xml.etree import ElementTree
+
+# Bump when extraction output changes so cached extractions are rebuilt
+EXTRACTION_VERSION = 5
+
+PLAIN_TEXT_EXTENSIONS = ('.txt', '.csv', '.json', '.yaml', '.xml', '.md',
+                         '.html', '.py', '.js', '.java', '.c', '.cpp', '.rb', '.sh')
+OFFICE_EXTENSIONS = ('.docx', '.xlsx', '.pptx')
+PDF_EXTENSIONS = ('.pdf',)
+
+# Optional libraries -> package to install
+BACKEND_PACKAGES = {
+    'docx': 'python-docx',
+    'pptx': 'python-pptx',
+    'openpyxl': 'openpyxl',
+    'pdfplumber': 'pdfplumber',
+    'pytesseract': 'pytesseract',
+    'pdf2image': 'pdf2image',
+}
 
 # Functions ------------------------------------------------------------
 
+class MissingDependencyError(ImportError):
+    pass
+
+def importBackend(moduleName):
+    # Imported on first use, so plain text never loads the PDF/Office stack
+    try:
+        return importlib.import_module(moduleName)
+    except ImportError as e:
+        raise MissingDependencyError(
+            f"'{moduleName}' is required for this file format, "
+            f"install it with: pip install {BACKEND_PACKAGES[moduleName]}") from e
+
+# Locators: extractors can record where pages, slides, sheets or cells
+# start as (part index, label) while appending text parts, converted to
+# (character offset, label) once the parts are joined
+def resolveSegments(textParts, separator, partSegments, segments):
+    if segments is None:
+        return
+    partOffsets = [0] + list(accumulate(len(part) + len(separator) for part in textParts))
+    for partIndex, label in partSegments:
+        segments.append((partOffsets[partIndex], label))
+
 # Plain text and programming files text extraction
-def extractPlainText(filePath):
+def extractPlainText(filePath, cancelEvent=None, progress=None, segments=None):
     with open(filePath, 'r', encoding='utf-8') as file:
         extractedText = file.read()
         return extractedText
     
+# Plain text read in fixed-size chunks (streaming search of large files)
+def iterPlainTextChunks(filePath, chunkSize=1024 * 1024):
+    with open(filePath, 'r', encoding='utf-8') as file:
+        for chunk in iter(lambda: file.read(chunkSize), ''):
+            yield chunk
+
 # Office documents text extraction
-def extractOfficeText(filePath):
+def extractOfficeText(filePath, cancelEvent=None, progress=None, segments=None):
+    partSegments = []
+
     if filePath.endswith('.docx'):
-        doc = Document(filePath)
+        doc = importBackend('docx').Document(filePath)
         text_parts = []
         
         # Extract main document paragraphs
+        checkCancelled(cancelEvent)
+        partSegments.append((len(text_parts), "body"))
         for para in doc.paragraphs:
             text_parts.append(para.text)
         
         # Extract text from tables
-        for table in doc.tables:
+        for tableNumber, table in enumerate(doc.tables, start=1):
+            checkCancelled(cancelEvent)
+            partSegments.append((len(text_parts), f"table {tableNumber}"))
             for row in table.rows:
                 for cell in row.cells:
                     # Each cell contains paragraphs
@@ -48,25 +114,33 @@ def extractOfficeText(filePath):
                         text_parts.append(para.text)
         
         # Extract headers and footers from all sections
-        for section in doc.sections:
+        for sectionNumber, section in enumerate(doc.sections, start=1):
             # Header
             header = section.header
+            partSegments.append((len(text_parts), f"section {sectionNumber} header"))
             for para in header.paragraphs:
                 text_parts.append(para.text)
             
             # Footer
             footer = section.footer
+            partSegments.append((len(text_parts), f"section {sectionNumber} footer"))
             for para in footer.paragraphs:
                 text_parts.append(para.text)
         
+        resolveSegments(text_parts, '\n', partSegments, segments)
         extractedText = '\n'.join(text_parts)
         return extractedText
     
     elif filePath.endswith('.pptx'):
-        prs = Presentation(filePath)
+        prs = importBackend('pptx').Presentation(filePath)
         text_parts = []
         
-        for slide in prs.slides:
+        totalSlides = len(prs.slides)
+        for slideNumber, slide in enumerate(prs.slides, start=1):
+            checkCancelled(cancelEvent)
+            reportProgress(progress, "Extracting slides", slideNumber, totalSlides)
+            partSegments.append((len(text_parts), f"slide {slideNumber}"))
+
             # Extract text from shapes
             for shape in slide.shapes:
                 # Handle text in text frames
@@ -88,40 +162,140 @@ def extractOfficeText(filePath):
                 notes_text_frame = notes_slide.notes_text_frame
                 text_parts.append(notes_text_frame.text)
         
+        resolveSegments(text_parts, '\n', partSegments, segments)
         extractedText = '\n'.join(text_parts)
         return extractedText
     
     elif filePath.endswith('.xlsx'):
-        wb = openpyxl.load_workbook(filePath, data_only=True)
-        text_parts = []
-        
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            
-            # Extract all cell values
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value is not None:
-                        text_parts.append(str(cell.value))
-                    
-                    # Extract comments if present
-                    if cell.comment:
-                        text_parts.append(cell.comment.text)
-        
-        wb.close()
-        extractedText = '\n'.join(text_parts)
-        return extractedText
+        return extractSpreadsheetText(filePath, cancelEvent, progress, segments)
 
     else:
         raise ValueError("Unsupported office document format")
     
+# Spreadsheet text extraction (streaming)
+SPREADSHEET_NAMESPACES = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'relationships': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+OFFICE_RELATIONSHIP = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+def readRelationships(archive, partPath):
+    # Relationship id -> (type, target part path) of an .xlsx part
+    relsPath = posixpath.join(posixpath.dirname(partPath), '_rels',
+                              posixpath.basename(partPath) + '.rels')
+    if relsPath not in archive.namelist():
+        return {}
+    relationships = {}
+    root = ElementTree.fromstring(archive.read(relsPath))
+    for relationship in root.iterfind('relationships:Relationship', SPREADSHEET_NAMESPACES):
+        target = relationship.get('Target')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(partPath), target))
+        relationships[relationship.get('Id')] = (relationship.get('Type'), target)
+    return relationships
+
+def readSpreadsheetComments(filePath):
+    # Read-only mode skips comments, they are read from the package XML:
+    # sheet name -> sorted [((row, column), coordinate, text)]
+    cellToTuple = importBackend('openpyxl').utils.cell.coordinate_to_tuple
+    comments = {}
+    with zipfile.ZipFile(filePath) as archive:
+        workbookPath = 'xl/workbook.xml'
+        workbookRelationships = readRelationships(archive, workbookPath)
+        workbook = ElementTree.fromstring(archive.read(workbookPath))
+        for sheet in workbook.iterfind('main:sheets/main:sheet', SPREADSHEET_NAMESPACES):
+            _, sheetPath = workbookRelationships.get(sheet.get(OFFICE_RELATIONSHIP), (None, None))
+            if sheetPath is None:
+                continue
+            sheetComments = []
+            for relationshipType, target in readRelationships(archive, sheetPath).values():
+                if not relationshipType.endswith('/comments') or target not in archive.namelist():
+                    continue
+                root = ElementTree.fromstring(archive.read(target))
+                for comment in root.iterfind('main:commentList/main:comment', SPREADSHEET_NAMESPACES):
+                    coordinate = comment.get('ref')
+                    text = ''.join(node.text or '' for node in comment.iter(
+                        f"{{{SPREADSHEET_NAMESPACES['main']}}}t"))
+                    sheetComments.append((cellToTuple(coordinate), coordinate, text))
+            comments[sheet.get('name')] = sorted(sheetComments)
+    return comments
+
+def iterSpreadsheetParts(filePath, cancelEvent=None, progress=None):
+    # (locator, text) of every cell value and comment in row-major order,
+    # rows are streamed from the file so memory stays flat
+    openpyxl = importBackend('openpyxl')
+    columnLetter = openpyxl.utils.cell.get_column_letter
+    comments = readSpreadsheetComments(filePath)
+    wb = openpyxl.load_workbook(filePath, read_only=True, data_only=True)
+    try:
+        for sheetNumber, sheet_name in enumerate(wb.sheetnames, start=1):
+            ws = wb[sheet_name]
+            # The stored <dimension> is often missing or wrong (files written
+            # by other tools), trusting it would truncate the sheet
+            ws.reset_dimensions()
+            reportProgress(progress, "Extracting sheets", sheetNumber, len(wb.sheetnames))
+            sheetComments = comments.get(sheet_name, [])
+            nextComment = 0
+            columnLetters = []
+
+            # Plain values (no cell objects), row and column come from the position
+            for rowNumber, row in enumerate(ws.iter_rows(min_row=1, min_col=1, values_only=True),
+                                            start=1):
+                if rowNumber % 1000 == 0:
+                    checkCancelled(cancelEvent)
+                while len(columnLetters) < len(row):
+                    columnLetters.append(columnLetter(len(columnLetters) + 1))
+                for columnIndex, value in enumerate(row):
+                    if value is None:
+                        continue
+                    position = (rowNumber, columnIndex + 1)
+
+                    # Comments of cells up to this one (empty cells included)
+                    while (nextComment < len(sheetComments)
+                           and sheetComments[nextComment][0] < position):
+                        _, coordinate, text = sheetComments[nextComment]
+                        yield f"{sheet_name}!{coordinate} (comment)", text
+                        nextComment += 1
+
+                    yield f"{sheet_name}!{columnLetters[columnIndex]}{rowNumber}", str(value)
+                    if nextComment < len(sheetComments) and sheetComments[nextComment][0] == position:
+                        _, coordinate, text = sheetComments[nextComment]
+                        yield f"{sheet_name}!{coordinate} (comment)", text
+                        nextComment += 1
+
+            for _, coordinate, text in sheetComments[nextComment:]:
+                yield f"{sheet_name}!{coordinate} (comment)", text
+    finally:
+        wb.close()
+
+def extractSpreadsheetText(filePath, cancelEvent=None, progress=None, segments=None):
+    text_parts = []
+    partSegments = []
+    for label, text in iterSpreadsheetParts(filePath, cancelEvent, progress):
+        partSegments.append((len(text_parts), label))
+        text_parts.append(text)
+
+    resolveSegments(text_parts, '\n', partSegments, segments)
+    extractedText = '\n'.join(text_parts)
+    return extractedText
+
 # PDF text extraction
-def extractPDFText(filePath):
-    textParts = []
-    
-    # Using pdfplumber for regular digital PDFs
-    with pdfplumber.open(filePath) as pdf:
-        for page in pdf.pages:
+PDF_PAGES_PER_BATCH = 8  # Pages extracted per task (and held in memory at once)
+PDF_PAGE_WORKERS = None  # Processes for page batches, None = all cores, 1 = in-process
+
+def extractPDFPages(filePath, firstPage, lastPage):
+    # Pages firstPage..lastPage (1-based) -> [(label, text parts)], runs in
+    # a worker process. The OCR decision is made per page: a page without
+    # text but with images is a scan, only that page is rendered and OCR'd
+    pdfplumber = importBackend('pdfplumber')
+    pages = []
+    # Only this batch's pages are parsed, not the whole document per worker
+    with pdfplumber.open(filePath, pages=range(firstPage, lastPage + 1)) as pdf:
+        for pageNumber, page in enumerate(pdf.pages, start=firstPage):
+            textParts = []
+
             # regular text
             pageText = page.extract_text()
             if pageText:
@@ -135,27 +309,125 @@ def extractPDFText(filePath):
                         # Join text from non-empty cells in each row
                         rowText = ' '.join([cell for cell in row if cell])
                         textParts.append(rowText)
-                        
-    # Using OCR for scanned or image-based PDFs
-    if not textParts:
-        images = convert_from_path(filePath)
-        for image in images:
-            ocrText = pytesseract.image_to_string(image)
-            textParts.append(ocrText)
 
+            # Using OCR for scanned or image-based pages
+            if not textParts and page.images:
+                pages.append((f"page {pageNumber} (OCR)", [ocrPDFPage(filePath, pageNumber)]))
+            else:
+                pages.append((f"page {pageNumber}", textParts))
+    return pages
+
+def ocrPDFPage(filePath, pageNumber):
+    # Only this page is rasterized, so memory stays bounded by one image
+    pytesseract = importBackend('pytesseract')
+    with instrumentation.span("OCR page"):
+        images = importBackend('pdf2image').convert_from_path(filePath, first_page=pageNumber,
+                                                              last_page=pageNumber)
+        instrumentation.count("OCR pages")
+        return ''.join(pytesseract.image_to_string(image) for image in images)
+
+def processPoolContext():
+    # Workers are started fresh (forkserver, or spawn where unavailable):
+    # forking the GUI process would copy its threads, locks and Tk state
+    import multiprocessing
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+def iterPDFPageBatches(filePath, totalPages, cancelEvent=None):
+    # Page batches in page order, extracted in parallel when worthwhile
+    batches = [(firstPage, min(firstPage + PDF_PAGES_PER_BATCH - 1, totalPages))
+               for firstPage in range(1, totalPages + 1, PDF_PAGES_PER_BATCH)]
+    workers = PDF_PAGE_WORKERS or os.cpu_count() or 1
+    if len(batches) == 1 or workers == 1:
+        for firstPage, lastPage in batches:
+            checkCancelled(cancelEvent)
+            yield extractPDFPages(filePath, firstPage, lastPage)
+        return
+
+    # Imported here: multiprocessing is only needed for multi-batch PDFs
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=processPoolContext())
+    try:
+        futures = [executor.submit(extractPDFPages, filePath, firstPage, lastPage)
+                   for firstPage, lastPage in batches]
+        for future in futures:
+            checkCancelled(cancelEvent)
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def extractPDFText(filePath, cancelEvent=None, progress=None, segments=None):
+    textParts = []
+    partSegments = []
+
+    with importBackend('pdfplumber').open(filePath) as pdf:
+        totalPages = len(pdf.pages)
+
+    pagesDone = 0
+    for pages in iterPDFPageBatches(filePath, totalPages, cancelEvent):
+        for label, pageParts in pages:
+            partSegments.append((len(textParts), label))
+            textParts.extend(pageParts)
+        pagesDone += len(pages)
+        reportProgress(progress, "Extracting pages", pagesDone, totalPages)
+
+    resolveSegments(textParts, '', partSegments, segments)
     extractedText = ''.join(textParts)
     return extractedText
 
-def chooseExtractionMethod(filePath):
-    if filePath.endswith(('.txt', '.csv', '.json', '.yaml', '.xml', '.md',
-                          '.html', '.py', '.js', '.java', '.c', '.cpp', '.rb', '.sh')):
-        return extractPlainText(filePath)
-    elif filePath.endswith(('.docx', '.xlsx', '.pptx')):
-        return extractOfficeText(filePath)
-    elif filePath.endswith('.pdf'):
-        return extractPDFText(filePath)
-    else:
+def isDiskCached(filePath):
+    # Plain text is read faster than a cache entry is decompressed, only
+    # formats with a costly extraction (PDF, OCR, Office) are cached
+    return os.path.splitext(filePath)[1].lower() not in PLAIN_TEXT_EXTENSIONS
+
+def extractDocument(filePath, cancelEvent=None, progress=None, segments=None):
+    # Extraction by format, without the disk cache
+    with instrumentation.span(f"extraction ({os.path.splitext(filePath)[1]})",
+                              os.path.getsize(filePath)):
+        return extractByFormat(filePath, cancelEvent, progress, segments)
+
+def chooseExtractionMethod(filePath, cancelEvent=None, progress=None, segments=None):
+    # Reuse a previous extraction of identical file contents if available
+    reportProgress(progress, "Reading file")
+    if not isDiskCached(filePath):
+        return extractDocument(filePath, cancelEvent, progress, segments)
+
+    fileHash = diskCache.hashFile(filePath)
+    entry = diskCache.load(fileHash)
+    if entry and entry.get('extractionVersion') == EXTRACTION_VERSION:
+        instrumentation.count("extraction cache hits")
+        if segments is not None:
+            segments.extend(tuple(segment) for segment in entry['segments'])
+        return entry['extractedText']
+
+    # Locators are always collected so the cache entry is complete
+    extractedSegments = []
+    extractedText = extractDocument(filePath, cancelEvent, progress, extractedSegments)
+    diskCache.store(fileHash, extractionVersion=EXTRACTION_VERSION,
+                    extractedText=extractedText, segments=extractedSegments)
+    if segments is not None:
+        segments.extend(extractedSegments)
+    return extractedText
+
+# Extension -> extraction function
+EXTRACTION_BACKENDS = {}
+SUPPORTED_EXTENSIONS = ()
+
+def registerBackend(extensions, extractor):
+    global SUPPORTED_EXTENSIONS
+    for extension in extensions:
+        EXTRACTION_BACKENDS[extension] = extractor
+    SUPPORTED_EXTENSIONS = tuple(EXTRACTION_BACKENDS)
+
+registerBackend(PLAIN_TEXT_EXTENSIONS, extractPlainText)
+registerBackend(OFFICE_EXTENSIONS, extractOfficeText)
+registerBackend(PDF_EXTENSIONS, extractPDFText)
+
+def extractByFormat(filePath, cancelEvent=None, progress=None, segments=None):
+    extractor = EXTRACTION_BACKENDS.get(os.path.splitext(filePath)[1])
+    if extractor is None:
         raise ValueError("Unsupported file format for extraction")
+    return extractor(filePath, cancelEvent, progress, segments)
 
 # Testing --------------------------------------------------------------
 
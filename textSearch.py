@@ -0,0 +1,217 @@
+"""
+Headless command line interface (no Tk needed):
+    python -m textSearch search PATTERN [PATHS...] [--algo kmp|z|sa] [--json]
+
+- --stream searches plain-text files chunk by chunk (KMP), so files
+larger than memory can be searched (not combinable with --whole-words
+or another --algo)
+
+- PATHS can be files, directories or glob patterns, '-' (or no paths)
+reads the text to search from stdin
+- --json prints one JSON object per file (JSON Lines)
+- --count prints match counts only, --exists only the files that match,
+--max-count N stops each file after its first N matches
+- --timings prints the time and bytes of every stage (extraction,
+cleaning, indexing, search) to stderr, --timings-json FILE exports them,
+--profile adds cProfile top functions and the tracemalloc peak
+- Exit codes: 0 = matches found, 1 = no matches, 2 = errors
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import textCleaning
+import patternSearching
+import documentCache
+import corpusSearch
+import instrumentation
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+# Functions ------------------------------------------------------------
+
+ALGORITHMS = {'z': 0, 'kmp': 1, 'sa': 2}
+
+EXIT_MATCHES = 0
+EXIT_NO_MATCHES = 1
+EXIT_ERROR = 2
+
+def searchStdin(pattern, algorithmSelected, wholeWords, mode='all', limit=None):
+    text = sys.stdin.read()
+    document = documentCache.CachedDocument('-', text, textCleaning.cleanText(text))
+    result = {'filePath': '-', 'occurrences': [], 'count': 0, 'executionTime': 0.0, 'error': None}
+    if mode == 'count':
+        result['count'], result['executionTime'] = patternSearching.countDocument(
+            document, pattern, algorithmSelected, wholeWords=wholeWords)
+        return result
+
+    occurrences, executionTime, _ = patternSearching.searchDocument(
+        document, pattern, algorithmSelected, wholeWords=wholeWords,
+        limit=1 if mode == 'exists' else limit)
+    result['occurrences'] = occurrences
+    result['count'] = len(occurrences)
+    result['executionTime'] = executionTime
+    return result
+
+def searchFileStreaming(filePath, pattern, mode='all', limit=None):
+    result = {'filePath': filePath, 'occurrences': [], 'count': 0, 'executionTime': 0.0,
+              'error': None}
+    startTime = time.perf_counter()
+    try:
+        # The stream is a generator, so early modes stop reading the file
+        matches = patternSearching.searchStream(filePath, pattern)
+        with instrumentation.span("stream search", os.path.getsize(filePath)):
+            if mode == 'count':
+                result['count'] = sum(1 for _ in matches)
+            else:
+                result['occurrences'] = list(islice(matches, 1 if mode == 'exists' else limit))
+                result['count'] = len(result['occurrences'])
+    except Exception as e:
+        result['error'] = str(e)
+    result['executionTime'] = (time.perf_counter() - startTime) * 1000  # Milliseconds
+    return result
+
+def searchPaths(paths, pattern, algorithmSelected, wholeWords, jobs, stream=False,
+                mode='all', limit=None):
+    if not paths or paths == ['-']:
+        yield searchStdin(pattern, algorithmSelected, wholeWords, mode, limit)
+        return
+
+    # Explicit paths that cannot be searched are reported, not skipped
+    for path in paths:
+        if not (os.path.isdir(path) or glob.has_magic(path) or corpusSearch.isSupportedFile(path)):
+            yield {'filePath': path, 'occurrences': [], 'count': 0, 'executionTime': 0.0,
+                   'error': "file not found or unsupported file type"}
+
+    filePaths = corpusSearch.expandPaths(paths)
+    if stream:
+        for filePath in filePaths:
+            yield searchFileStreaming(filePath, pattern, mode, limit)
+    elif len(filePaths) == 1 or jobs == 1:
+        # No process pool for a single file (or when asked not to)
+        for filePath in filePaths:
+            yield corpusSearch.searchFile(filePath, pattern, algorithmSelected, wholeWords,
+                                          mode, limit)
+    else:
+        yield from corpusSearch.searchCorpus(filePaths, pattern, algorithmSelected,
+                                             wholeWords, maxWorkers=jobs, mode=mode, limit=limit)
+
+def printResult(result, asJson, mode='all'):
+    if asJson:
+        record = {'path': result['filePath'],
+                  'matches': result['count'],
+                  'executionTime': result['executionTime'],
+                  'error': result['error']}
+        if mode == 'exists':
+            record = {'path': record['path'], 'exists': result['count'] > 0,
+                      'executionTime': record['executionTime'], 'error': record['error']}
+        elif mode != 'count':
+            record['positions'] = result['occurrences']
+        print(json.dumps(record), flush=True)
+    elif result['error']:
+        print(f"{result['filePath']}: error: {result['error']}", file=sys.stderr)
+    elif mode == 'count':
+        print(f"{result['filePath']}: {result['count']}", flush=True)
+    elif not result['count']:
+        return
+    elif mode == 'exists':
+        print(result['filePath'], flush=True)
+    else:
+        positions = ' '.join(str(position) for position in result['occurrences'])
+        print(f"{result['filePath']}: {result['count']} matches: {positions}", flush=True)
+
+def runSearch(args):
+    if args.count:
+        mode = 'count'
+    elif args.exists:
+        mode = 'exists'
+    elif args.max_count is not None:
+        mode = 'first'
+    else:
+        mode = 'all'
+
+    foundMatches = False
+    hadErrors = False
+    # Stages of files searched in worker processes (--jobs > 1) are not recorded
+    with instrumentation.recording(f"search '{args.pattern}'", args.profile) as recorder:
+        for result in searchPaths(args.paths, args.pattern, ALGORITHMS[args.algo or 'kmp'],
+                                  args.whole_words, args.jobs, args.stream, mode, args.max_count):
+            foundMatches = foundMatches or result['count'] > 0
+            hadErrors = hadErrors or bool(result['error'])
+            printResult(result, args.json, mode)
+
+    if args.timings or args.profile:
+        print(recorder.summary(), file=sys.stderr)
+    if args.timings_json:
+        with open(args.timings_json, 'w', encoding='utf-8') as file:
+            file.write(recorder.toJson())
+
+    if hadErrors:
+        return EXIT_ERROR
+    return EXIT_MATCHES if foundMatches else EXIT_NO_MATCHES
+
+def positiveInt(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+def buildParser():
+    parser = argparse.ArgumentParser(prog='textSearch',
+                                     description="Search text in documents without the GUI.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="search a pattern in files")
+    search.add_argument('pattern', help="text to search for (cleaned like the document text)")
+    search.add_argument('paths', nargs='*',
+                        help="files, directories or glob patterns ('-' or none reads stdin)")
+    # None (= kmp) so an explicit choice can be told apart for --stream
+    search.add_argument('--algo', choices=sorted(ALGORITHMS), default=None,
+                        help="search algorithm (default: kmp)")
+    search.add_argument('--whole-words', action='store_true',
+                        help="match whole words only, using the word index")
+    search.add_argument('--stream', action='store_true',
+                        help="search plain-text files chunk by chunk with bounded memory (KMP only,"
+                             " no --whole-words)")
+    search.add_argument('--json', action='store_true',
+                        help="print one JSON object per file (JSON Lines)")
+    search.add_argument('--jobs', type=int, default=None,
+                        help="worker processes for several files (default: all cores)")
+    search.add_argument('--timings', action='store_true',
+                        help="print the time spent in each stage to stderr")
+    search.add_argument('--timings-json', metavar='FILE',
+                        help="export the stage timings as JSON")
+    search.add_argument('--profile', action='store_true',
+                        help="also profile the search (cProfile top functions, tracemalloc peak)")
+    modes = search.add_mutually_exclusive_group()
+    modes.add_argument('--count', action='store_true',
+                       help="print the number of matches per file, without positions")
+    modes.add_argument('--exists', '-l', action='store_true',
+                       help="print only the files that match, stopping at their first match")
+    modes.add_argument('--max-count', '-m', type=positiveInt, metavar='N',
+                       help="stop each file after its first N matches")
+    search.set_defaults(run=runSearch)
+    return parser
+
+def main(argv=None):
+    parser = buildParser()
+    args = parser.parse_args(argv)
+    # The streaming search is KMP only and has no word index
+    if args.command == 'search' and args.stream:
+        if args.whole_words:
+            parser.error("--stream cannot be combined with --whole-words")
+        if args.algo not in (None, 'kmp'):
+            parser.error(f"--stream only supports --algo kmp, not {args.algo}")
+    try:
+        return args.run(args)
+    except (OSError, ValueError) as e:
+        print(f"textSearch: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+if __name__ == '__main__':
+    sys.exit(main())
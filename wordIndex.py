@@ -0,0 +1,73 @@
+"""
+Inverted word index for whole-word searching:
+- Built once per document from the cleaned text
+- Maps every term to array-backed postings: character offsets in the
+cleaned text and word ordinals (position of the word in the text)
+- Single words are a postings read, phrases intersect the postings of
+their words through the ordinals instead of scanning the whole text
+
+"""
+
+# Imports ------------------------------------------------------------
+
+import textCleaning
+from array import array
+from bisect import bisect_left
+import sys
+
+# Classes & Functions --------------------------------------------------
+
+class WordIndex:
+    def __init__(self, cleanedText):
+        self.offsets = {}  # term -> array of character offsets
+        self.ordinals = {}  # term -> array of word ordinals
+        self.build(cleanedText)
+
+    def build(self, cleanedText):
+        # Cleaned text has single spaces between words and no leading space,
+        # so each offset follows from the length of the previous word
+        offset = 0
+        for ordinal, word in enumerate(textCleaning.separateWords(cleanedText)):
+            if word not in self.offsets:
+                self.offsets[word] = array('q')
+                self.ordinals[word] = array('i')
+            self.offsets[word].append(offset)
+            self.ordinals[word].append(ordinal)
+            offset += len(word) + 1
+
+    def search(self, cleanedPattern):
+        words = textCleaning.separateWords(cleanedPattern)
+        if not words or any(word not in self.offsets for word in words):
+            return []
+        if len(words) == 1:
+            return list(self.offsets[words[0]])
+        return self.searchPhrase(words)
+
+    def searchPhrase(self, words):
+        # Start from the rarest word, then confirm every other word sits at
+        # the expected ordinal with a binary search in its postings
+        rarest = min(range(len(words)), key=lambda i: len(self.ordinals[words[i]]))
+        firstOrdinals = self.ordinals[words[0]]
+        firstOffsets = self.offsets[words[0]]
+        occurrences = []
+
+        for ordinal in self.ordinals[words[rarest]]:
+            start = ordinal - rarest
+            if start < 0:
+                continue
+            if all(self.hasWordAt(words[i], start + i) for i in range(len(words))):
+                position = bisect_left(firstOrdinals, start)
+                occurrences.append(firstOffsets[position])
+        return occurrences
+
+    def hasWordAt(self, word, ordinal):
+        postings = self.ordinals[word]
+        position = bisect_left(postings, ordinal)
+        return position < len(postings) and postings[position] == ordinal
+
+    def sizeInBytes(self):
+        size = sys.getsizeof(self.offsets) + sys.getsizeof(self.ordinals)
+        for word, offsets in self.offsets.items():
+            ordinals = self.ordinals[word]
+            size += sys.getsizeof(word) + sys.getsizeof(offsets) + sys.getsizeof(ordinals)
+        return size